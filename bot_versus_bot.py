@@ -1,40 +1,21 @@
 from dlgo.agent.naive import RandomBot
-from dlgo import agent
-from dlgo import goboard_fast as goboard
-from dlgo import gotypes
 from dlgo.agent.mcts.mcts import MCTSAgent
-from dlgo.agent.minimax.alphabeta import AlphaBetaAgent
-from dlgo.utils import print_board, print_move
-import time
+from dlgo.tournament import SPRT, AgentSpec, run_match
 
 
 def main():
-    dct = {}
     board_size = 9
-    game = goboard.GameState.new_game(board_size)
-    bots = {
-        gotypes.Player.black: MCTSAgent(20, temperature=1.4),
-        gotypes.Player.white: agent.naive.RandomBot(),
-    }
-    for i in range(50):
-        game = goboard.GameState.new_game(board_size)
-        while not game.is_over():
-            # Установка таймера на 0,3 секунды обеспечивает задержку между отображением ходов ботов.
-            # time.sleep(0.3)
+    mcts = AgentSpec('mcts', MCTSAgent, (20,), {'temperature': 1.4})
+    random_bot = AgentSpec('random', RandomBot)
 
-            # Перед выполнением каждого хода экран очищается, благодаря чему
-            # доска всегда отображается в одном и том же месте командной строки.
-            #print(chr(27) + "[2J")
-            #print_board(game.board)
-            bot_move = bots[game.next_player].select_move(game)
-            #print_move(game.next_player, bot_move)
-            game = game.apply_move(bot_move)
-        print(f"Winner: {game.winner()}")
-        if dct.get(game.winner()):
-            dct[game.winner()] += 1
-        else:
-            dct[game.winner()] = 1
-    print(dct)
+    # Результат каждой партии печатается, как только она закончилась
+    def on_game(record, result):
+        print(f"Game {record.index}: {record.black} (black) vs {record.white} (white), "
+              f"winner: {record.winner}, {record.num_moves} moves")
+
+    # Матч заканчивается раньше 50 партий, если SPRT уже принял одну из гипотез
+    result = run_match(mcts, random_bot, 50, board_size, on_game=on_game, sprt=SPRT(0, 100))
+    print(result)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,5 @@
+import sys
+
 from dlgo.gotypes import Point
 
 
@@ -33,3 +35,27 @@ def is_point_an_eye(board, point, color):
         return off_board_corners + friendly_corners == 4
     # Point is in the middle.
     return friendly_corners >= 3
+
+
+def same_move(a, b):
+    # Moves from different goboard modules do not compare equal.
+    return (a.is_pass, a.is_resign, a.point) == (b.is_pass, b.is_resign, b.point)
+
+
+def move_class(game_state):
+    # The Move class of the goboard module the game is played with.
+    return sys.modules[type(game_state).__module__].Move
+
+
+def same_board(a, b):
+    # Boards without Zobrist hashes (goboard_slow) are compared point by point.
+    if a.num_rows != b.num_rows or a.num_cols != b.num_cols:
+        return False
+    if hasattr(a, 'zobrist_hash') and hasattr(b, 'zobrist_hash'):
+        return a.zobrist_hash() == b.zobrist_hash()
+    for r in range(1, a.num_rows + 1):
+        for c in range(1, a.num_cols + 1):
+            point = Point(row=r, col=c)
+            if a.get(point) != b.get(point):
+                return False
+    return True
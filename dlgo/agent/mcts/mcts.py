@@ -1,8 +1,14 @@
 import math
 import random
+import threading
+import time
 
 from dlgo import agent
-from dlgo.gotypes import Player
+from dlgo.agent.helpers import move_class, same_board, same_move
+from dlgo.agent.mcts.stats import SearchStats, measure_tree
+from dlgo.agent.mcts.transposition import NodeStats
+from dlgo.encoders import encode_boards
+from dlgo.gotypes import Player, Point
 from dlgo.utils import coords_from_point
 
 __all__ = [
@@ -42,29 +48,108 @@ def show_tree(node, indent='', max_depth=3):
 
 
 class MCTSNode(object):
-    def __init__(self, game_state, parent=None, move=None):
+    def __init__(self, game_state, parent=None, move=None, table=None):
         self.game_state = game_state
         self.parent = parent
         self.move = move
-        self.win_counts = {
-            Player.black: 0,
-            Player.white: 0,
-        }
-        self.num_rollouts = 0
+        # With a transposition table, nodes reaching the same situation
+        # through different move orders share their statistics.
+        self.table = table
+        if table is None:
+            self.stats = NodeStats()
+        else:
+            self.stats = table.get(game_state)
+        # All-moves-as-first statistics, keyed by point: how often the
+        # player to move here played that point later in a rollout, and
+        # how often they went on to win.
+        self.rave_wins = {}
+        self.rave_rollouts = {}
         self.children = []
-        self.unvisited_moves = game_state.legal_moves()
+        # Most nodes are simulated once and never visited again, so the
+        # untried moves are only generated when the node is expanded.
+        self._unvisited_moves = None
+
+    @property
+    def unvisited_moves(self):
+        """Untried candidate moves: every empty point plus pass and
+        resign. Legality is only checked once a move is picked.
+        """
+        if self._unvisited_moves is None:
+            board = self.game_state.board
+            move_type = move_class(self.game_state)
+            moves = []
+            for r in range(1, board.num_rows + 1):
+                for c in range(1, board.num_cols + 1):
+                    point = Point(row=r, col=c)
+                    if board.get(point) is None:
+                        moves.append(move_type.play(point))
+            moves.append(move_type.pass_turn())
+            moves.append(move_type.resign())
+            self._unvisited_moves = moves
+        return self._unvisited_moves
 
     def add_random_child(self):
-        index = random.randint(0, len(self.unvisited_moves) - 1)
-        new_move = self.unvisited_moves.pop(index)
+        """Expand a random legal untried move. Returns None if none of
+        the remaining candidates is legal.
+        """
+        while self.can_add_child():
+            new_node = self.add_child(random.randrange(len(self.unvisited_moves)))
+            if new_node is not None:
+                return new_node
+        return None
+
+    def add_child(self, index):
+        """Expand the untried move at `index`. An illegal move is dropped
+        and None is returned.
+        """
+        moves = self.unvisited_moves
+        # Swap the move to the end so removing it is O(1).
+        moves[index], moves[-1] = moves[-1], moves[index]
+        new_move = moves.pop()
+        if new_move.is_play and not self.game_state.is_valid_move(new_move):
+            return None
         new_game_state = self.game_state.apply_move(new_move)
-        new_node = MCTSNode(new_game_state, self, new_move)
+        new_node = MCTSNode(new_game_state, self, new_move, self.table)
         self.children.append(new_node)
         return new_node
 
+    @property
+    def win_counts(self):
+        return self.stats.win_counts
+
+    @property
+    def num_rollouts(self):
+        return self.stats.num_rollouts
+
     def record_win(self, winner):
-        self.win_counts[winner] += 1
-        self.num_rollouts += 1
+        self.stats.win_counts[winner] += 1
+        self.stats.num_rollouts += 1
+
+    def record_value(self, black_share):
+        """Record one rollout worth `black_share` of a win for black."""
+        self.stats.win_counts[Player.black] += black_share
+        self.stats.win_counts[Player.white] += 1 - black_share
+        self.stats.num_rollouts += 1
+
+    def add_virtual_loss(self):
+        """Count a pending evaluation of this node as a loss for the
+        player who moved into it, steering other descents elsewhere.
+        """
+        self.stats.win_counts[self.game_state.next_player] += 1
+        self.stats.num_rollouts += 1
+        self.stats.virtual_losses += 1
+
+    def revert_virtual_loss(self):
+        self.stats.win_counts[self.game_state.next_player] -= 1
+        self.stats.num_rollouts -= 1
+        self.stats.virtual_losses -= 1
+
+    def record_rave_wins(self, winner, points):
+        won = winner == self.game_state.next_player
+        for point in points:
+            self.rave_rollouts[point] = self.rave_rollouts.get(point, 0) + 1
+            if won:
+                self.rave_wins[point] = self.rave_wins.get(point, 0) + 1
 
     def can_add_child(self):
         return len(self.unvisited_moves) > 0
@@ -75,51 +160,426 @@ class MCTSNode(object):
     def winning_frac(self, player):
         return float(self.win_counts[player]) / float(self.num_rollouts)
 
+    def rave_winning_frac(self, move):
+        """AMAF win rate of `move` for the player to move here, or None
+        if the move was never played in a rollout through this node.
+        """
+        if not move.is_play or move.point not in self.rave_rollouts:
+            return None
+        return float(self.rave_wins.get(move.point, 0)) / \
+            float(self.rave_rollouts[move.point])
+
+    def find_child(self, move):
+        """Return the child reached by `move`, or None if not expanded."""
+        for child in self.children:
+            if same_move(child.move, move):
+                return child
+        return None
+
 
 class MCTSAgent(agent.Agent):
-    def __init__(self, num_rounds, temperature):
+    """Monte Carlo tree search agent.
+
+    `num_rounds` caps the number of rollouts per move. With a
+    `time_control` (see `TimeControl`) the search instead runs until the
+    move's time budget is spent, and `num_rounds` may be None. A timed
+    search also stops early once the most-visited child can no longer be
+    overtaken with the rollouts left in the budget, and the time saved is
+    carried over to later moves by the time control. It always runs at
+    least `min_rounds` rounds (or `num_rounds`, if fewer), even past the
+    deadline, so that a tiny budget still yields a searched move. Either
+    way the agent plays the most-visited root child (see `best_child`).
+
+    With `rave=True` every rollout also updates, in each node on its
+    path, all-moves-as-first (AMAF) statistics for every point the player
+    to move there played later in the rollout. New children are expanded
+    in order of their AMAF win rate, and `select_child` blends it into the
+    UCT score with a weight that decays as the child gets real visits
+    (see `child_value`, which also breaks visit ties for the final move);
+    `rave_equivalence` is the number of visits at which both estimates
+    weigh roughly the same.
+
+    A `transposition_table` (see `TranspositionTable`) makes all nodes of
+    one situation share their statistics, across move orders and across
+    moves of the game. A newly expanded node whose situation already has
+    statistics is not simulated again: its current win rate is backed up
+    instead of a fresh rollout.
+
+    An `evaluator` (see `LinearValueEvaluator`) scores leaves in batches:
+    `batch_size` descents are made, each adding a virtual loss along its
+    path so the next descent explores elsewhere, and the collected leaves
+    are encoded into one array and evaluated in a single call.
+    `evaluator_weight` mixes the evaluator's value with a random rollout
+    (1.0 uses the evaluator only). Batched rounds do not update RAVE
+    statistics.
+
+    With `ponder=True`, a background thread keeps searching the subtree of
+    the chosen move after `select_move` returns, i.e. while the opponent
+    thinks. If the next `select_move` call follows one of the pondered
+    replies, the search continues in that subtree. Pondering stops after
+    `ponder_max_rounds` rounds (which bounds the nodes it adds), when the
+    next move is requested, or on `stop_pondering()`.
+
+    Every search fills a `SearchStats` (rollouts per second, time spent in
+    each phase, tree size and depth, approximate memory), kept as
+    `last_stats` and passed to `stats_callback` if one is given. The
+    candidate moves and the stats are only printed with `verbose=True`.
+    """
+    def __init__(self, num_rounds, temperature, time_control=None,
+                 rave=False, rave_equivalence=1000, transposition_table=None,
+                 evaluator=None, batch_size=8, evaluator_weight=1.0,
+                 ponder=False, ponder_max_rounds=10000, min_rounds=10,
+                 stats_callback=None, verbose=False):
         agent.Agent.__init__(self)
+        assert num_rounds is not None or time_control is not None
         self.num_rounds = num_rounds
         self.temperature = temperature
+        self.time_control = time_control
+        self.rave = rave
+        self.rave_equivalence = rave_equivalence
+        self.transposition_table = transposition_table
+        self.evaluator = evaluator
+        self.batch_size = batch_size
+        self.evaluator_weight = evaluator_weight
+        self.ponder = ponder
+        self.ponder_max_rounds = ponder_max_rounds
+        self.min_rounds = min_rounds
+        self._ponder_root = None
+        self._ponder_thread = None
+        self._ponder_stop = threading.Event()
+        self.stats_callback = stats_callback
+        self.verbose = verbose
+        self.last_stats = None
 
     def select_move(self, game_state):
-        root = MCTSNode(game_state)
-        for i in range(self.num_rounds):
-            node = root
-            while (not node.can_add_child()) and (not node.is_terminal()):
-                node = self.select_child(node)
+        root = self.take_ponder_tree(game_state)
+        if root is None:
+            root = MCTSNode(game_state, table=self.transposition_table)
+        stats = SearchStats()
+        start = time.perf_counter()
+        if self.time_control is None:
+            rounds = 0
+            while rounds < self.num_rounds:
+                rounds += self.run_step(root, self.num_rounds - rounds, stats)
+        else:
+            self.run_timed_search(root, stats)
+            self.time_control.end_move()
+        stats.elapsed = time.perf_counter() - start
+        measure_tree(root, stats)
+        self.last_stats = stats
+        if self.stats_callback is not None:
+            self.stats_callback(stats)
+
+        if self.verbose:
+            scored_moves = [
+                (child.winning_frac(game_state.next_player), child.move, child.num_rollouts)
+                for child in root.children
+            ]
+            scored_moves.sort(key=lambda x: x[0], reverse=True)
+            for s, m, n in scored_moves[:10]:
+                print('%s - %.3f (%d)' % (m, s, n))
+
+        # Having performed as many MCTS rounds as we have time for, we
+        # now pick a move. A timed search may stop as soon as the
+        # most-visited child is decided, and win rates of children with a
+        # handful of visits are mostly noise, so we play the most-visited
+        # child.
+        best_child = self.best_child(root)
+        best_pct = self.child_value(root, best_child)
+        best_move = best_child.move
+        if self.verbose:
+            print('Select move %s with win pct %.3f' % (best_move, best_pct))
+            print(stats)
+        if self.ponder:
+            self.start_pondering(best_child)
+        return best_move
+
+    def child_value(self, node, child):
+        """Win rate of `child` for the player to move at `node`, blended
+        with its AMAF win rate when RAVE is on.
+        """
+        if child.num_rollouts == 0:
+            return 0.0
+        win_percentage = child.winning_frac(node.game_state.next_player)
+        rave_percentage = node.rave_winning_frac(child.move) if self.rave else None
+        if rave_percentage is not None:
+            # Hand-tuned RAVE schedule: the AMAF weight starts at 1
+            # and decays towards 0 as real visits accumulate.
+            beta = math.sqrt(
+                self.rave_equivalence /
+                (3 * child.num_rollouts + self.rave_equivalence))
+            win_percentage = (1 - beta) * win_percentage + beta * rave_percentage
+        return win_percentage
+
+    def best_child(self, root):
+        """Return the most-visited root child, breaking ties by
+        `child_value` and then in favor of playing a stone over passing.
+        Resigning is only chosen if every other child lost all its
+        rollouts.
+        """
+        player = root.game_state.next_player
+        candidates = [child for child in root.children if not child.move.is_resign]
+        if not candidates or all(
+                child.num_rollouts > 0 and child.win_counts[player] == 0
+                for child in candidates):
+            candidates = root.children
+        return max(
+            candidates,
+            key=lambda c: (c.num_rollouts, self.child_value(root, c), c.move.is_play))
+
+    def start_pondering(self, node):
+        """Search `node`'s subtree in a background thread until stopped."""
+        self.stop_pondering()
+        # Detach the subtree so the rest of the old tree can be freed and
+        # pondering backups stop at the new root.
+        node.parent = None
+        self._ponder_root = node
+        if node.is_terminal():
+            return
+        self._ponder_stop.clear()
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(node,), daemon=True)
+        self._ponder_thread.start()
 
-            # Add a new child node into the tree.
-            if node.can_add_child():
-                node = node.add_random_child()
+    def stop_pondering(self):
+        """Cancel background pondering and wait for it to finish."""
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = None
 
-            # Simulate a random game from this node.
-            winner = self.simulate_random_game(node.game_state)
+    def _ponder(self, root):
+        stats = SearchStats()
+        rounds = 0
+        while not self._ponder_stop.is_set() and rounds < self.ponder_max_rounds:
+            rounds += self.run_step(root, self.ponder_max_rounds - rounds, stats)
 
-            # Propagate scores back up the tree.
+    def take_ponder_tree(self, game_state):
+        """Stop pondering and return the pondered node for `game_state`,
+        detached from the tree, or None if the opponent's reply was not
+        explored.
+        """
+        self.stop_pondering()
+        ponder_root, self._ponder_root = self._ponder_root, None
+        if ponder_root is None or game_state.last_move is None:
+            return None
+        node = ponder_root.find_child(game_state.last_move)
+        if node is None or node.game_state.next_player != game_state.next_player:
+            return None
+        if not same_board(node.game_state.board, game_state.board):
+            # The game did not continue with the move we chose.
+            return None
+        node.parent = None
+        return node
+
+    def run_step(self, root, max_rounds, stats):
+        """Run a single round, or a batch of at most `max_rounds` rounds
+        with an evaluator. Returns the number of rounds played.
+        """
+        if self.evaluator is None:
+            self.run_round(root, stats)
+            return 1
+        return self.run_batch(root, min(self.batch_size, max_rounds), stats)
+
+    def run_round(self, root, stats):
+        """Run a single select-expand-simulate-backup round from `root`
+        and add its phase timings to `stats`.
+        """
+        t_start = time.perf_counter()
+        node = root
+        while (not node.is_terminal()) and (not node.can_add_child()):
+            node = self.select_child(node)
+        t_selected = time.perf_counter()
+
+        # Add a new child node into the tree.
+        new_node = None
+        if (not node.is_terminal()) and node.can_add_child():
+            if self.rave:
+                new_node = self.add_rave_child(node)
+            else:
+                new_node = node.add_random_child()
+            if new_node is not None:
+                node = new_node
+        t_expanded = time.perf_counter()
+
+        if new_node is not None and new_node.num_rollouts > 0:
+            # A transposition we already know: reuse its statistics.
+            self.backup_value(node.parent, node.winning_frac(Player.black))
+            stats.record_round(
+                t_selected - t_start, t_expanded - t_selected,
+                0.0, time.perf_counter() - t_expanded)
+            return
+
+        # Simulate a random game from this node; a finished game is
+        # scored as it is.
+        played = None
+        if self.rave:
+            played = {
+                Player.black: set(),
+                Player.white: set(),
+            }
+        if node.is_terminal():
+            winner = node.game_state.winner()
+        else:
+            winner = self.simulate_random_game(node.game_state, played)
+        t_simulated = time.perf_counter()
+
+        # Propagate scores back up the tree.
+        if played is None:
             while node is not None:
                 node.record_win(winner)
                 node = node.parent
+        else:
+            self.backup_rave(node, winner, played)
+        stats.record_round(
+            t_selected - t_start, t_expanded - t_selected,
+            t_simulated - t_expanded, time.perf_counter() - t_simulated)
 
-        scored_moves = [
-            (child.winning_frac(game_state.next_player), child.move, child.num_rollouts)
-            for child in root.children
-        ]
-        scored_moves.sort(key=lambda x: x[0], reverse=True)
-        for s, m, n in scored_moves[:10]:
-            print('%s - %.3f (%d)' % (m, s, n))
+    def run_batch(self, root, batch_size, stats):
+        """Collect up to `batch_size` leaves under virtual loss, score them
+        with one evaluator call and back up the results.
+        Returns the number of rounds played.
+        """
+        selection = expansion = backup = 0.0
+        pending = []
+        for i in range(batch_size):
+            t_start = time.perf_counter()
+            node = root
+            while (not node.is_terminal()) and (not node.can_add_child()):
+                node = self.select_child(node)
+            t_selected = time.perf_counter()
+            new_node = None
+            if (not node.is_terminal()) and node.can_add_child():
+                new_node = node.add_random_child()
+                if new_node is not None:
+                    node = new_node
+            t_expanded = time.perf_counter()
+            selection += t_selected - t_start
+            expansion += t_expanded - t_selected
+            if node.is_terminal():
+                # A finished game needs no evaluation: its real result is
+                # recorded on the node itself and all its ancestors.
+                self.backup_value(node, 1.0 if node.game_state.winner() == Player.black else 0.0)
+                backup += time.perf_counter() - t_expanded
+                continue
+            if new_node is not None and new_node.num_rollouts > 0 and \
+                    new_node.stats.virtual_losses == 0:
+                # A transposition we already know: reuse its statistics.
+                self.backup_value(node.parent, node.winning_frac(Player.black))
+                backup += time.perf_counter() - t_expanded
+                continue
+            leaf = node
+            while node.parent is not None:
+                node.add_virtual_loss()
+                node = node.parent
+            pending.append(leaf)
+            backup += time.perf_counter() - t_expanded
 
-        # Having performed as many MCTS rounds as we have time for, we
-        # now pick a move.
-        best_move = None
-        best_pct = -1.0
-        for child in root.children:
-            child_pct = child.winning_frac(game_state.next_player)
-            if child_pct > best_pct:
-                best_pct = child_pct
-                best_move = child.move
-        print('Select move %s with win pct %.3f' % (best_move, best_pct))
-        return best_move
+        t_start = time.perf_counter()
+        values = self.evaluate_leaves([leaf.game_state for leaf in pending])
+        t_evaluated = time.perf_counter()
+        for leaf, black_share in zip(pending, values):
+            node = leaf
+            while node.parent is not None:
+                node.revert_virtual_loss()
+                node = node.parent
+            self.backup_value(leaf, black_share)
+        backup += time.perf_counter() - t_evaluated
+        stats.record_round(
+            selection, expansion, t_evaluated - t_start, backup, rounds=batch_size)
+        return batch_size
+
+    def evaluate_leaves(self, game_states):
+        """Return black's winning chances for each game state, using one
+        evaluator call for all unfinished games.
+        """
+        values = [None] * len(game_states)
+        to_evaluate = []
+        for i, game_state in enumerate(game_states):
+            if game_state.is_over():
+                values[i] = 1.0 if game_state.winner() == Player.black else 0.0
+            else:
+                to_evaluate.append(i)
+        if to_evaluate:
+            boards = encode_boards([game_states[i].board for i in to_evaluate])
+            estimates = self.evaluator.evaluate(boards)
+            for i, estimate in zip(to_evaluate, estimates):
+                value = float(estimate)
+                if self.evaluator_weight < 1.0:
+                    winner = self.simulate_random_game(game_states[i])
+                    rollout_value = 1.0 if winner == Player.black else 0.0
+                    value = self.evaluator_weight * value + \
+                        (1 - self.evaluator_weight) * rollout_value
+                values[i] = value
+        return values
+
+    @staticmethod
+    def backup_value(node, black_share):
+        """Propagate a value in [0, 1] for black up the tree."""
+        while node is not None:
+            node.record_value(black_share)
+            node = node.parent
+
+    @staticmethod
+    def backup_rave(node, winner, played):
+        """Propagate a rollout result up the tree together with its AMAF
+        statistics. `played` maps each player to the points they played
+        during the rollout.
+        """
+        while node is not None:
+            node.record_win(winner)
+            # Credit every point the player to move here went on to play
+            # at some point below this node.
+            node.record_rave_wins(winner, played[node.game_state.next_player])
+            if node.move is not None and node.move.is_play:
+                played[node.parent.game_state.next_player].add(node.move.point)
+            node = node.parent
+
+    def run_timed_search(self, root, stats):
+        """Run rounds until the time control's deadline or until the
+        choice of the most-visited root child is settled.
+        Returns the number of rounds played.
+        """
+        start = time.perf_counter()
+        deadline = self.time_control.start_move(root.game_state)
+        min_rounds = self.min_rounds
+        if self.num_rounds is not None:
+            min_rounds = min(min_rounds, self.num_rounds)
+        rounds = 0
+        while self.num_rounds is None or rounds < self.num_rounds:
+            if self.num_rounds is None:
+                rounds += self.run_step(root, self.batch_size, stats)
+            else:
+                rounds += self.run_step(root, self.num_rounds - rounds, stats)
+            if rounds < min_rounds:
+                # Слишком малый бюджет не должен оставлять корень почти неисследованным
+                continue
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # Estimate how many more rounds fit in the budget at the
+            # current rollout rate.
+            rate = rounds / max(now - start, 1e-9)
+            rounds_left = int(rate * (deadline - now))
+            if self.num_rounds is not None:
+                rounds_left = min(rounds_left, self.num_rounds - rounds)
+            if self.is_decided(root, rounds_left):
+                break
+        return rounds
+
+    @staticmethod
+    def is_decided(root, rounds_left):
+        """True if no other child can catch up with the most-visited
+        root child within `rounds_left` more rounds.
+        """
+        if root.can_add_child():
+            # Unexpanded moves could still receive all remaining visits.
+            return False
+        if len(root.children) < 2:
+            return True
+        first, second = sorted(
+            (child.num_rollouts for child in root.children), reverse=True)[:2]
+        return first - second > rounds_left
 
     def select_child(self, node):
         """Select a child according to the upper confidence bound for
@@ -133,7 +593,7 @@ class MCTSAgent(agent.Agent):
         # Loop over each child.
         for child in node.children:
             # Calculate the UCT score.
-            win_percentage = child.winning_frac(node.game_state.next_player)
+            win_percentage = self.child_value(node, child)
             exploration_factor = math.sqrt(log_rollouts / child.num_rollouts)
             uct_score = win_percentage + self.temperature * exploration_factor
             # Check if this is the largest we've seen so far.
@@ -143,12 +603,40 @@ class MCTSAgent(agent.Agent):
         return best_child
 
     @staticmethod
-    def simulate_random_game(game):
+    def add_rave_child(node):
+        """Expand the legal untried move with the best AMAF win rate.
+        Moves never seen in a rollout count as even, passing and resigning
+        as lost; ties are broken at random.
+        """
+        while node.can_add_child():
+            best_index = None
+            best_score = -1.0
+            for index, move in enumerate(node.unvisited_moves):
+                score = node.rave_winning_frac(move)
+                if score is None:
+                    score = 0.5 if move.is_play else 0.0
+                score += random.random() * 1e-6
+                if score > best_score:
+                    best_score = score
+                    best_index = index
+            new_node = node.add_child(best_index)
+            if new_node is not None:
+                return new_node
+        return None
+
+    @staticmethod
+    def simulate_random_game(game, played=None):
+        """Play random moves until the game ends and return the winner.
+        If `played` is given, the points each player plays are added to
+        `played[player]`.
+        """
         bots = {
             Player.black: agent.RandomBot(),
             Player.white: agent.RandomBot(),
         }
         while not game.is_over():
             bot_move = bots[game.next_player].select_move(game)
+            if played is not None and bot_move.is_play:
+                played[game.next_player].add(bot_move.point)
             game = game.apply_move(bot_move)
         return game.winner()
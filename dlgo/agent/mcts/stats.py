@@ -0,0 +1,83 @@
+import sys
+
+__all__ = [
+    'SearchStats',
+    'measure_tree',
+]
+
+
+class SearchStats:
+    """Counters for one MCTS search, filled in by `MCTSAgent`.
+    Times are in seconds; `memory_bytes` is a rough estimate of the
+    footprint of the tree's nodes and boards.
+    """
+    def __init__(self):
+        self.rounds = 0
+        self.elapsed = 0.0
+        self.selection_time = 0.0
+        self.expansion_time = 0.0
+        self.simulation_time = 0.0
+        self.backup_time = 0.0
+        self.tree_size = 0
+        self.max_depth = 0
+        self.avg_depth = 0.0
+        self.memory_bytes = 0
+
+    def record_round(self, selection, expansion, simulation, backup, rounds=1):
+        self.rounds += rounds
+        self.selection_time += selection
+        self.expansion_time += expansion
+        self.simulation_time += simulation
+        self.backup_time += backup
+
+    @property
+    def rollouts_per_sec(self):
+        if self.elapsed <= 0:
+            return 0.0
+        return self.rounds / self.elapsed
+
+    def as_dict(self):
+        result = dict(self.__dict__)
+        result['rollouts_per_sec'] = self.rollouts_per_sec
+        return result
+
+    def __str__(self):
+        return (
+            '%d rounds in %.3fs (%.1f rollouts/s); '
+            'select %.3fs, expand %.3fs, simulate %.3fs, backup %.3fs; '
+            'tree %d nodes, depth max %d avg %.2f, ~%.1f KiB' % (
+                self.rounds, self.elapsed, self.rollouts_per_sec,
+                self.selection_time, self.expansion_time,
+                self.simulation_time, self.backup_time,
+                self.tree_size, self.max_depth, self.avg_depth,
+                self.memory_bytes / 1024.0))
+
+
+def measure_tree(root, stats):
+    """Fill in the tree size, depth and memory fields of `stats`."""
+    num_nodes = 0
+    num_leaves = 0
+    total_leaf_depth = 0
+    max_depth = 0
+    memory = 0
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        num_nodes += 1
+        memory += sys.getsizeof(node) + sys.getsizeof(node.__dict__) + \
+            sys.getsizeof(node.children) + sys.getsizeof(node.game_state) + \
+            sys.getsizeof(getattr(node.game_state.board, '_grid', None))
+        if node._unvisited_moves is not None:
+            memory += sys.getsizeof(node._unvisited_moves)
+        if depth > max_depth:
+            max_depth = depth
+        if not node.children:
+            num_leaves += 1
+            total_leaf_depth += depth
+        for child in node.children:
+            stack.append((child, depth + 1))
+    stats.tree_size = num_nodes
+    stats.max_depth = max_depth
+    stats.avg_depth = float(total_leaf_depth) / num_leaves
+    stats.memory_bytes = memory
+    return stats
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+from dlgo.gotypes import Player
+from dlgo.symmetry import canonical_hash
+
+__all__ = [
+    'NodeStats',
+    'TranspositionTable',
+]
+
+
+class NodeStats:
+    """Rollout statistics of a position. Tree nodes that reach the same
+    position share one instance through a `TranspositionTable`.
+    """
+    def __init__(self):
+        self.win_counts = {
+            Player.black: 0,
+            Player.white: 0,
+        }
+        self.num_rollouts = 0
+        # Pending batched evaluations counted as losses, see MCTSAgent.
+        self.virtual_losses = 0
+
+
+class TranspositionTable:
+    """Bounded map from a situation to its `NodeStats`.
+
+    Keys are `(next_player, board.zobrist_hash())`, so the table needs a
+    board with Zobrist hashing (goboard_normal or goboard_fast). When the
+    table holds `max_entries` situations, the least recently used one is
+    evicted; nodes already pointing at its stats keep them.
+
+    With `symmetric`, the board's hash is replaced by its canonical hash
+    over its rotations and reflections, so symmetric positions share
+    their statistics.
+    """
+    def __init__(self, max_entries=100000, symmetric=False):
+        self.max_entries = max_entries
+        self.symmetric = symmetric
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, game_state):
+        if self.symmetric:
+            return game_state.next_player, canonical_hash(game_state.board)[0]
+        return game_state.next_player, game_state.board.zobrist_hash()
+
+    def get(self, game_state):
+        """Return the stats for this situation, creating them if needed."""
+        key = self.key(game_state)
+        stats = self._entries.get(key)
+        if stats is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return stats
+        self.misses += 1
+        stats = NodeStats()
+        self._entries[key] = stats
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return stats
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, game_state):
+        return self.key(game_state) in self._entries
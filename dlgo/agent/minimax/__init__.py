@@ -1,3 +1,10 @@
 from .alphabeta import *
+from .batch import *
 from .depthprune import *
-from .minimax import *
\ No newline at end of file
+from .minimax import *
+from .movegen import *
+from .ordering import *
+from .quiescence import *
+from .solver import *
+from .territory import *
+from .transposition import *
@@ -1,8 +1,18 @@
+import copy
+import multiprocessing
+import pickle
 import random
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 from dlgo.agent import Agent
-from dlgo.gotypes import Player
+from dlgo.agent.minimax.batch import frontier_scores
+from dlgo.agent.minimax.context import BoundRaised, SearchContext, SearchTimeout
 from dlgo.agent.minimax.helpers import capture_diff
+from dlgo.agent.minimax.movegen import root_moves
+from dlgo.agent.minimax.ordering import MoveOrderer
+from dlgo.agent.minimax.quiescence import quiescence_result
+from dlgo.agent.minimax.transposition import Bound, TranspositionTable, order_tt_move
 
 __all__ = [
     'AlphaBetaAgent',
@@ -10,9 +20,27 @@ __all__ = [
 
 MAX_SCORE = 999999
 MIN_SCORE = -999999
+# Bounds of a full search window, just outside the range of any score.
+INFINITY = MAX_SCORE + 1
 
+SearchResult = namedtuple('SearchResult', 'best_moves score pv scored_moves')
 
-def alpha_beta_result(game_state, max_depth, best_black, best_white, eval_fn):
+
+def alpha_beta_result(game_state, max_depth, alpha, beta, eval_fn,
+                      context=None, ply=1, pv=None):
+    """Negamax alpha-beta search with principal variation search.
+
+    Returns the score of `game_state` for the player to move. The result
+    is exact if it lies strictly inside `(alpha, beta)`; otherwise it is
+    an upper bound (at most `alpha`) or a lower bound (at least `beta`).
+    If `pv` is a list, it is filled with the principal variation.
+    """
+    if context is None:
+        context = SearchContext()
+    # Подсчет узлов; прерывание поиска, если отведенное на ход время истекло
+    context.visit()
+    tt = context.tt
+    orderer = context.orderer
     # проверка на предмет окончания игры
     if game_state.is_over():
         if game_state.winner() == game_state.next_player:
@@ -21,78 +49,477 @@ def alpha_beta_result(game_state, max_depth, best_black, best_white, eval_fn):
             return MIN_SCORE
     # Достижение максимальной глубины поиска. Используйте свой эвристический метод для оценки последовательности ходов.
     if max_depth == 0:
+        if context.quiescence_nodes:
+            # За горизонтом поиска рассматриваются только взятия и уходы из атари
+            return quiescence_result(game_state, alpha, beta, eval_fn, context)
         return eval_fn(game_state)
 
-    best_so_far = MIN_SCORE
+    entry = None
+    if tt is not None:
+        entry = tt.probe(game_state)
+        if entry is not None and entry.depth >= max_depth:
+            # Результат поиска такой же или большей глубины уже известен
+            if entry.bound == Bound.exact or \
+                    (entry.bound == Bound.lower and entry.score >= beta) or \
+                    (entry.bound == Bound.upper and entry.score <= alpha):
+                if pv is not None and entry.best_move is not None:
+                    pv[:] = [entry.best_move]
+                return entry.score
+    # Ходы генерируются, только если таблица не дала ответа: это самая дорогая часть узла
+    moves = context.legal_moves(game_state)
+    if max_depth == 1 and context.batch_eval_fn is not None and not context.quiescence_nodes:
+        # Все позиции на горизонте поиска оцениваются одним векторизованным вызовом
+        scores = frontier_scores(game_state, moves, context)
+        best_so_far = max(scores)
+        best_move = moves[scores.index(best_so_far)]
+        if pv is not None:
+            pv[:] = [best_move]
+        if orderer is not None and best_so_far >= beta:
+            orderer.record_cutoff(best_move, ply, max_depth)
+        if tt is not None:
+            tt.store(game_state, max_depth, best_so_far, Bound.exact, best_move)
+        return best_so_far
+    if orderer is not None:
+        # Сначала рассматриваются ходы, которые вероятнее всего приведут к отсечению
+        moves = orderer.order(game_state, moves, ply, entry and entry.best_move)
+        # Отсекаются только упорядоченные ходы, иначе остались бы первые точки доски
+        moves = context.prune(moves)
+    else:
+        # Лучший ход из таблицы рассматривается первым
+        moves = order_tt_move(moves, entry)
+
+    original_alpha = alpha
+    best_so_far = -INFINITY
+    best_move = None
     # Циклическая обработка всех допустимых ходов
-    for candidate_move in game_state.legal_moves():
+    for i, candidate_move in enumerate(moves):
         # Вычислить, как будет выглядеть доска в случае выбора этого хода
         next_state = game_state.apply_move(candidate_move)
-        # Определение лучшего результата противника, исходя из этой позиции
-        opponent_best_result = alpha_beta_result(
-            next_state, max_depth - 1,
-            best_black, best_white,
-            eval_fn)
-        # Что бы ни было нужно противнику, игроку-агенту нужно противоположное
-        our_result = -1 * opponent_best_result
+        child_pv = [] if pv is not None else None
+        if i == 0:
+            # Первый (предположительно лучший) ход рассматривается с полным окном
+            our_result = -alpha_beta_result(
+                next_state, max_depth - 1, -beta, -alpha,
+                eval_fn, context, ply + 1, child_pv)
+        else:
+            # Остальные ходы проверяются нулевым окном: достаточно узнать, что ход не лучше найденного
+            our_result = -alpha_beta_result(
+                next_state, max_depth - 1, -alpha - 1, -alpha,
+                eval_fn, context, ply + 1, child_pv)
+            if alpha < our_result < beta:
+                # Ход оказался лучше: повторный поиск с полным окном для точной оценки
+                child_pv = [] if pv is not None else None
+                our_result = -alpha_beta_result(
+                    next_state, max_depth - 1, -beta, -alpha,
+                    eval_fn, context, ply + 1, child_pv)
 
         if our_result > best_so_far:
             best_so_far = our_result
-        # Узнать, превосходит ли этот результат все рассмотренные до этого варианты.
-        if game_state.next_player == Player.white:
-            # Обновление лучшего результата для игрока белыми.
-            if best_so_far > best_white:
-                best_white = best_so_far
-            # Выбор хода для белых, который должен быть достаточно сильным, чтобы перебить предыдущий ход черных
-            outcome_for_black = -1 * best_so_far
-            # После нахождения варианта, превосходящего лучший ход черных, поиск можно прекратить
-            if outcome_for_black < best_black:
-                return best_so_far
-        elif game_state.next_player == Player.black:
-            # Обновление лучшего результата для игрока черными.
-            if best_so_far > best_black:
-                best_black = best_so_far
-            # Выбор хода для черных, который должен быть достаточно сильным, чтобы перебить предыдущий ход белых.
-            outcome_for_white = -1 * best_so_far
-            if outcome_for_white < best_white:
-                return best_so_far
+            best_move = candidate_move
+        if our_result > alpha:
+            alpha = our_result
+            if pv is not None:
+                pv[:] = [candidate_move] + child_pv
+        # Противник не допустит этой позиции, поиск можно прекратить
+        if alpha >= beta:
+            if orderer is not None:
+                orderer.record_cutoff(candidate_move, ply, max_depth)
+            if tt is not None:
+                tt.store(game_state, max_depth, best_so_far, Bound.lower, best_move)
+            return best_so_far
 
+    if tt is not None:
+        bound = Bound.upper if best_so_far <= original_alpha else Bound.exact
+        tt.store(game_state, max_depth, best_so_far, bound, best_move)
     return best_so_far
 
 
+def probe_root_move(next_state, depth, best_score, eval_fn, context, pv):
+    """Score a root move that is searched after the first one. A narrow
+    window around `best_score` tells whether the move is worse, equally
+    good (for integer scores) or better; only a better move is searched
+    again for its exact score.
+    """
+    our_result = -alpha_beta_result(
+        next_state, depth - 1, -best_score - 1, -best_score + 1,
+        eval_fn, context, 1, pv)
+    if our_result >= best_score + 1:
+        pv[:] = []
+        our_result = -alpha_beta_result(
+            next_state, depth - 1, -INFINITY, -best_score,
+            eval_fn, context, 1, pv)
+    return our_result
+
+
+def detach_history(game_state):
+    """Return a copy of `game_state` without the chain of earlier states,
+    so that it can be pickled cheaply. The ko history is kept in
+    `previous_states`, and the previous state keeps its board and last
+    move, which the game-over check and the ko point need. States of
+    goboard_slow walk the whole chain for ko and are returned as is.
+    """
+    previous = game_state.previous_state
+    if previous is None or not hasattr(game_state, 'previous_states'):
+        return game_state
+    previous = copy.copy(previous)
+    previous.previous_state = None
+    previous.previous_states = frozenset()
+    game_state = copy.copy(game_state)
+    game_state.previous_state = previous
+    return game_state
+
+
+# State of a parallel search worker process, set up by `_init_worker`.
+_worker = {}
+
+
+def _init_worker(shared_best, shared_position_id, positions, eval_fn, tt_slots,
+                 use_orderer, search_options):
+    _worker['best'] = shared_best
+    _worker['position_id'] = shared_position_id
+    _worker['positions'] = positions
+    _worker['eval_fn'] = eval_fn
+    _worker['search_options'] = search_options
+    _worker['tt'] = TranspositionTable(tt_slots) if tt_slots else None
+    _worker['orderer'] = MoveOrderer() if use_orderer else None
+    _worker['search_id'] = None
+    _worker['position'] = (None, None, None)
+
+
+def _search_root_move(search_id, position_id, index, depth, deadline):
+    if _worker['position_id'].value != position_id:
+        # Задача осталась от предыдущего поиска
+        return None
+    if search_id != _worker['search_id']:
+        # Первая задача нового хода: таблица и упорядочивание стареют, как в основном процессе
+        _worker['search_id'] = search_id
+        if _worker['tt'] is not None:
+            _worker['tt'].new_search()
+        if _worker['orderer'] is not None:
+            _worker['orderer'].new_search()
+    if _worker['position'][0] != position_id:
+        # Позиция передается в процесс один раз за поиск, а не с каждой задачей
+        game_state, moves = pickle.loads(_worker['positions'][position_id])
+        _worker['position'] = (position_id, game_state, moves)
+    _, game_state, moves = _worker['position']
+    next_state = game_state.apply_move(moves[index])
+    context = SearchContext(
+        _worker['tt'], _worker['orderer'], deadline,
+        shared_bound=_worker['best'], **_worker['search_options'])
+    while True:
+        # Pick up the best root score found so far by any process, and
+        # search again whenever another process raises it.
+        context.bound = best_score = _worker['best'].value
+        pv = []
+        try:
+            score = probe_root_move(
+                next_state, depth, best_score, _worker['eval_fn'], context, pv)
+        except BoundRaised:
+            continue
+        return index, score, best_score, pv, context.nodes
+
+
+class ParallelRootSearch:
+    """Searches root moves in a pool of worker processes.
+
+    Each search publishes its position once, pickled without the chain
+    of earlier states, and the tasks only name a move by its index. The
+    best root score is kept in shared memory: a worker reads it when it
+    starts a move and every `BOUND_CHECK_NODES` nodes after that, and
+    searches the move again against the new bound when it has been
+    raised. Every worker keeps its own transposition table and move
+    orderer across searches, and starts a new search on them whenever
+    `new_search` has been called.
+    """
+    def __init__(self, num_workers, eval_fn, tt_slots=None, use_orderer=False,
+                 search_options=None):
+        self.best = multiprocessing.Value('d', -INFINITY)
+        self.position_id = multiprocessing.Value('l', 0)
+        self.manager = multiprocessing.Manager()
+        self.positions = self.manager.dict()
+        self.search_id = 0
+        self.failed = False
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(self.best, self.position_id, self.positions, eval_fn, tt_slots,
+                      use_orderer, search_options or {}))
+
+    def new_search(self):
+        """Start a new search (a new move) in the workers."""
+        self.search_id += 1
+
+    def raise_bound(self, score):
+        self.best.value = score
+
+    def publish(self, game_state, moves):
+        """Hand the position and the moves to search to the workers and
+        return its id. The position is pickled here, so a position that
+        cannot be pickled fails before any task is submitted.
+        """
+        data = pickle.dumps((detach_history(game_state), moves))
+        position_id = self.position_id.value + 1
+        self.positions.clear()
+        self.positions[position_id] = data
+        self.position_id.value = position_id
+        return position_id
+
+    def search(self, game_state, moves, depth, best_score, deadline=None):
+        """Yield `(index, score, bound, pv, nodes)` for each move as soon
+        as it is searched; `bound` is the best score it was searched
+        against. Raises SearchTimeout if the deadline passes.
+        """
+        self.raise_bound(best_score)
+        position_id = self.publish(game_state, moves)
+        pending = set()
+        try:
+            for i in range(len(moves)):
+                pending.add(self.executor.submit(
+                    _search_root_move, self.search_id, position_id, i, depth, deadline))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        yield result
+        except (SearchTimeout, GeneratorExit):
+            raise
+        except BaseException:
+            self.failed = True
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        if self.failed:
+            # После сбоя пул может не завершиться сам: процессы останавливаются принудительно.
+            # The executor has no public way to reach its processes.
+            for process in list(self.executor._processes.values()):
+                process.terminate()
+        self.executor.shutdown(wait=not self.failed, cancel_futures=True)
+        self.manager.shutdown()
+
+
 class AlphaBetaAgent(Agent):
-    def __init__(self, max_depth, eval_fn=capture_diff):
+    """Depth-limited negamax search with alpha-beta pruning and principal
+    variation search. `max_depth` counts plies including the root move.
+
+    An optional `transposition_table` (see `TranspositionTable`) caches
+    results of positions reached by different move orders and remembers
+    the best move of each position for move ordering. The table is kept
+    between moves, so it needs a board with Zobrist hashing.
+
+    With a `time_control` (see `TimeControl`) the agent uses iterative
+    deepening: it searches to depth 1, 2, 3, ... until the move's time
+    budget runs out (or `max_depth`, which may then be None, is reached)
+    and plays the best move of the deepest completed iteration. Each
+    iteration searches the root moves in the order of the previous
+    iteration's scores, starts with an aspiration window of
+    `aspiration_window` around the previous score, and deeper levels
+    reuse the previous iterations through the transposition table if
+    there is one.
+
+    A `move_orderer` (see `MoveOrderer`) sorts the moves of every node so
+    that good moves, and therefore cutoffs, come first. The number of
+    nodes visited, the score and the principal variation of the last
+    search are kept in `last_nodes`, `last_score` and `last_pv`.
+
+    With `num_workers` > 1, the root is searched in parallel in the Young
+    Brothers Wait style: the first (best-ordered) root move is searched
+    here to establish a bound, then the remaining root moves are handed
+    to a pool of worker processes that share the best score as it
+    improves (see `ParallelRootSearch`). `eval_fn` must then be picklable (a module-level function)
+    and workers use their own transposition tables. Call `close()` to
+    shut the pool down.
+
+    With a `batch_eval_fn` (such as `capture_diff_batch`), nodes one ply
+    above the horizon score all their children with one call on the
+    stacked board encodings instead of calling `eval_fn` per leaf; such
+    nodes give up cutoffs among their children.
+
+    With `quiescence_nodes`, positions at the horizon are not evaluated in
+    the middle of a fight: captures and atari escapes are followed
+    further (see `quiescence_result`), searching at most that many moves
+    below each horizon position. The batch evaluation is not used then.
+
+    A `move_generator` (see `MoveGenerator`) narrows the moves searched:
+    no resigning below the root, no filling of our own eyes, optionally
+    only moves near stones and forward pruning to the best-ordered moves.
+    """
+    def __init__(self, max_depth, eval_fn=capture_diff, transposition_table=None,
+                 time_control=None, move_orderer=None, aspiration_window=2,
+                 num_workers=None, batch_eval_fn=None, quiescence_nodes=None,
+                 move_generator=None):
         Agent.__init__(self)
+        assert max_depth is not None or time_control is not None
+        # Forward pruning keeps the best-ordered moves, so it needs an orderer.
+        assert move_generator is None or move_generator.top_k is None or \
+            move_orderer is not None
         self.max_depth = max_depth
         self.eval_fn = eval_fn
+        self.transposition_table = transposition_table
+        self.time_control = time_control
+        self.move_orderer = move_orderer
+        self.aspiration_window = aspiration_window
+        self.num_workers = num_workers
+        self.batch_eval_fn = batch_eval_fn
+        self.quiescence_nodes = quiescence_nodes
+        self.move_generator = move_generator
+        self._parallel = None
+        # Results of the last completed search, for reporting.
+        self.last_depth = None
+        self.last_nodes = 0
+        self.last_score = None
+        self.last_pv = []
 
     def select_move(self, game_state):
-        best_moves = []
-        best_score = None
-        best_black = MIN_SCORE
-        best_white = MIN_SCORE
-        # Loop over all legal moves.
-        for possible_move in game_state.legal_moves():
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        if self._parallel is not None:
+            self._parallel.new_search()
+        moves = root_moves(game_state, self.move_generator)
+        if self.move_orderer is not None:
+            self.move_orderer.new_search()
+            tt_move = None
+            if self.transposition_table is not None:
+                entry = self.transposition_table.probe(game_state)
+                tt_move = entry and entry.best_move
+            moves = self.move_orderer.order(game_state, moves, 0, tt_move)
+        if self.time_control is None:
+            context = SearchContext(
+                self.transposition_table, self.move_orderer, **self.search_options())
+            result = self.search_root(game_state, moves, self.max_depth, context)
+            self.last_depth = self.max_depth
+            self.last_nodes = context.nodes
+            self.last_score = result.score
+            self.last_pv = result.pv
+            # For variety, randomly select among all equally good moves.
+            return random.choice(result.best_moves)
+
+        deadline = self.time_control.start_move(game_state)
+        context = SearchContext(
+            self.transposition_table, self.move_orderer, deadline, **self.search_options())
+        result = None
+        depth = 1
+        max_depth = self.max_depth
+        if max_depth is None:
+            max_depth = game_state.board.num_rows * game_state.board.num_cols
+        self.last_depth = None
+        while depth <= max_depth:
+            try:
+                result = self.search_root(
+                    game_state, moves, depth, context,
+                    guess=result.score if result is not None else None)
+            except SearchTimeout:
+                break
+            self.last_depth = depth
+            # Search the most promising moves first in the next iteration.
+            moves = [move for score, move in sorted(
+                result.scored_moves, key=lambda x: x[0], reverse=True)]
+            depth += 1
+        self.time_control.end_move()
+        self.last_nodes = context.nodes
+        if result is None:
+            # Not even the first iteration finished: play the first
+            # move that is not a resignation.
+            self.last_score = None
+            self.last_pv = []
+            return [move for move in moves if not move.is_resign][0]
+        self.last_score = result.score
+        self.last_pv = result.pv
+        return random.choice(result.best_moves)
+
+    def search_root(self, game_state, moves, depth, context, guess=None):
+        """Search each of `moves` so that the whole line is `depth` plies
+        deep. Returns a `SearchResult` with all equally best moves, their
+        score, the principal variation and `(score, move)` pairs, which
+        are exact for the best moves and upper bounds for the others.
+        """
+        # The first move is always searched here, with the full window.
+        first_move = moves[0]
+        best_pv = []
+        best_score = self.search_first_move(
+            game_state.apply_move(first_move), depth, context, guess, best_pv)
+        best_moves = [first_move]
+        best_pv = [first_move] + best_pv
+        scored_moves = [(best_score, first_move)]
+
+        if self.num_workers is not None and self.num_workers > 1 and len(moves) > 1:
+            parallel = self.parallel_search()
+            for index, our_best_outcome, bound, child_pv, nodes in parallel.search(
+                    game_state, moves[1:], depth, best_score, context.deadline):
+                context.nodes += nodes
+                possible_move = moves[index + 1]
+                scored_moves.append((our_best_outcome, possible_move))
+                if our_best_outcome > best_score:
+                    best_moves = [possible_move]
+                    best_score = our_best_outcome
+                    best_pv = [possible_move] + child_pv
+                    parallel.raise_bound(best_score)
+                elif our_best_outcome == best_score and \
+                        (bound == best_score or our_best_outcome >= bound + 1):
+                    # The score is exact if the move was probed against the
+                    # current best score or re-searched after beating an
+                    # older one.
+                    best_moves.append(possible_move)
+            return SearchResult(best_moves, best_score, best_pv, scored_moves)
+
+        # Loop over the remaining legal moves.
+        for possible_move in moves[1:]:
             # Calculate the game state if we select this move.
             next_state = game_state.apply_move(possible_move)
-            # Determination of the best result of the opponent, based on this position
-            opponent_best_outcome = alpha_beta_result(
-                next_state, self.max_depth,
-                best_black, best_white,
-                self.eval_fn)
-            # Since our opponent plays next, figure out their best
-            # possible outcome from there.
-            our_best_outcome = -1 * opponent_best_outcome
-            if (not best_moves) or our_best_outcome > best_score:
+            child_pv = []
+            our_best_outcome = probe_root_move(
+                next_state, depth, best_score, self.eval_fn, context, child_pv)
+            scored_moves.append((our_best_outcome, possible_move))
+            if our_best_outcome > best_score:
                 # This is the best move so far.
                 best_moves = [possible_move]
                 best_score = our_best_outcome
-                if game_state.next_player == Player.black:
-                    best_black = best_score
-                elif game_state.next_player == Player.white:
-                    best_white = best_score
+                best_pv = [possible_move] + child_pv
             elif our_best_outcome == best_score:
                 # This is as good as our previous best move.
                 best_moves.append(possible_move)
-        # For variety, randomly select among all equally good moves.
-        return random.choice(best_moves)
+        return SearchResult(best_moves, best_score, best_pv, scored_moves)
+
+    def parallel_search(self):
+        """Return the worker pool, starting it on first use."""
+        if self._parallel is None:
+            tt_slots = None
+            if self.transposition_table is not None:
+                tt_slots = self.transposition_table.num_slots
+            self._parallel = ParallelRootSearch(
+                self.num_workers, self.eval_fn, tt_slots, self.move_orderer is not None,
+                self.search_options())
+        return self._parallel
+
+    def search_options(self):
+        """Options of the agent that are passed on to `SearchContext`."""
+        return {
+            'batch_eval_fn': self.batch_eval_fn,
+            'quiescence_nodes': self.quiescence_nodes,
+            'move_generator': self.move_generator,
+        }
+
+    def close(self):
+        """Shut down the worker processes of a parallel search."""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def search_first_move(self, next_state, depth, context, guess, pv):
+        """Search the first root move exactly, trying an aspiration window
+        around `guess` before falling back to the full window.
+        """
+        if guess is not None and self.aspiration_window is not None:
+            low = guess - self.aspiration_window
+            high = guess + self.aspiration_window
+            score = -alpha_beta_result(
+                next_state, depth - 1, -high, -low, self.eval_fn, context, 1, pv)
+            if low < score < high:
+                return score
+            # The score fell outside the window: search again without it.
+            pv[:] = []
+        return -alpha_beta_result(
+            next_state, depth - 1, -INFINITY, INFINITY, self.eval_fn, context, 1, pv)
@@ -0,0 +1,51 @@
+from dlgo.encoders import encode_boards
+from dlgo.gotypes import Player
+
+__all__ = [
+    'capture_diff_batch',
+    'frontier_scores',
+]
+
+MAX_SCORE = 999999
+MIN_SCORE = -999999
+
+
+def capture_diff_batch(boards):
+    """Batch version of `capture_diff`: takes an (N, rows, cols) int8
+    array from `encode_boards` and returns the N stone differences from
+    black's point of view.
+    """
+    return boards.sum(axis=(1, 2), dtype=int)
+
+
+def frontier_scores(game_state, moves, context):
+    """Score every move of a node one ply above the search horizon.
+
+    All child positions are built first and the ones where the game goes
+    on are scored with a single call to `context.batch_eval_fn`, which
+    takes the stacked board encodings and returns a score per board from
+    black's point of view. Returns the scores of `moves` for the player
+    to move in `game_state`.
+    """
+    children = []
+    scores = []
+    leaves = []
+    for candidate_move in moves:
+        context.visit()
+        next_state = game_state.apply_move(candidate_move)
+        if next_state.is_over():
+            if next_state.winner() == next_state.next_player:
+                scores.append(MIN_SCORE)
+            else:
+                scores.append(MAX_SCORE)
+        else:
+            leaves.append(len(scores))
+            children.append(next_state.board)
+            scores.append(None)
+    if children:
+        # После хода очередь за противником: оценка черных совпадает с нашей, если ходят черные
+        sign = 1 if game_state.next_player == Player.black else -1
+        values = context.batch_eval_fn(encode_boards(children)).tolist()
+        for i, value in zip(leaves, values):
+            scores[i] = sign * value
+    return scores
@@ -0,0 +1,66 @@
+import time
+
+__all__ = [
+    'BoundRaised',
+    'SearchContext',
+    'SearchTimeout',
+]
+
+# How often, in nodes, a search checks whether its shared bound was raised.
+BOUND_CHECK_NODES = 64
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class BoundRaised(Exception):
+    pass
+
+
+class SearchContext:
+    """State shared by all nodes of one minimax search: the optional
+    transposition table, move orderer, deadline, batch evaluation
+    function, quiescence node budget and move generator, plus a count of
+    the nodes visited.
+
+    A search of a root move against `bound` may also watch
+    `shared_bound`, a `multiprocessing.Value` that other processes raise
+    as they find better root moves; the search then stops with
+    `BoundRaised` so that it can be restarted against the new bound.
+    """
+    def __init__(self, tt=None, orderer=None, deadline=None, batch_eval_fn=None,
+                 quiescence_nodes=None, move_generator=None, shared_bound=None):
+        self.tt = tt
+        self.orderer = orderer
+        self.deadline = deadline
+        self.batch_eval_fn = batch_eval_fn
+        self.quiescence_nodes = quiescence_nodes
+        self.quiescence_left = 0
+        self.move_generator = move_generator
+        self.shared_bound = shared_bound
+        self.bound = None
+        self.nodes = 0
+
+    def legal_moves(self, game_state):
+        """The moves to search below the root."""
+        if self.move_generator is None:
+            return game_state.legal_moves()
+        return self.move_generator.legal_moves(game_state)
+
+    def prune(self, moves):
+        """Forward-prune moves that have been ordered."""
+        if self.move_generator is None:
+            return moves
+        return self.move_generator.prune(moves)
+
+    def visit(self):
+        """Count a node and stop the search if the deadline has passed
+        or the shared bound has been raised above `bound`.
+        """
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if self.shared_bound is not None and self.nodes % BOUND_CHECK_NODES == 0 and \
+                self.shared_bound.value > self.bound:
+            raise BoundRaised()
@@ -1,7 +1,11 @@
 import random
 
 from dlgo.agent import Agent
+from dlgo.agent.minimax.batch import frontier_scores
+from dlgo.agent.minimax.context import SearchContext
 from dlgo.agent.minimax.helpers import capture_diff
+from dlgo.agent.minimax.movegen import root_moves
+from dlgo.agent.minimax.quiescence import quiescence_result
 from dlgo.scoring import GameResult
 
 __all__ = [
@@ -20,7 +24,10 @@ def reverse_game_result(game_result):
     return GameResult.draw
 
 
-def best_result(game_state, max_depth, eval_fn):
+def best_result(game_state, max_depth, eval_fn, context=None, ply=1):
+    if context is None:
+        context = SearchContext()
+    context.visit()
     # Если игра окончена, уже известен победитель
     if game_state.is_over():
         if game_state.winner() == game_state.next_player:
@@ -29,16 +36,27 @@ def best_result(game_state, max_depth, eval_fn):
             return MIN_SCORE
 
     if max_depth == 0:
+        if context.quiescence_nodes:
+            # За горизонтом поиска рассматриваются только взятия и уходы из атари
+            return quiescence_result(game_state, MIN_SCORE - 1, MAX_SCORE + 1, eval_fn, context)
         return eval_fn(game_state)
 
+    moves = context.legal_moves(game_state)
+    if max_depth == 1 and context.batch_eval_fn is not None and not context.quiescence_nodes:
+        # Все позиции на горизонте поиска оцениваются одним векторизованным вызовом
+        return max(frontier_scores(game_state, moves, context))
+    if context.orderer is not None:
+        moves = context.orderer.order(game_state, moves, ply)
+        # Отсекаются только упорядоченные ходы, иначе остались бы первые точки доски
+        moves = context.prune(moves)
     best_so_far = MIN_SCORE
     # Циклическая обработка всех допустимых ходов
-    for candidate_move in game_state.legal_moves():
+    for candidate_move in moves:
         # Вычислить, как будет выглядеть доска в случае выбора этого хода
         next_state = game_state.apply_move(candidate_move)
         # Вычислить лучший результат противника, исходя из этой позиции
         opponent_best_result = best_result(
-            next_state, max_depth - 1, eval_fn)
+            next_state, max_depth - 1, eval_fn, context, ply + 1)
         # Что бы ни было нужно противнику, игроку-агенту нужно противоположное
         our_result = -1 * opponent_best_result
         # Узнать, превосходит ли этот результат все рассмотренные до этого варианты
@@ -49,21 +67,49 @@ def best_result(game_state, max_depth, eval_fn):
 
 
 class DepthPrunedAgent(Agent):
-    def __init__(self, max_depth, eval_fn=capture_diff):
+    """Depth-limited minimax search without pruning. `max_depth` counts
+    plies including the root move.
+
+    Accepts the same `move_orderer` as `AlphaBetaAgent`; without pruning
+    the order does not change the result or the number of nodes visited,
+    which is kept in `last_nodes` as a baseline for the pruned searches.
+    A `batch_eval_fn` scores the leaves under each node one ply above the
+    horizon in a single call, and `quiescence_nodes` extends the horizon
+    positions with captures and atari escapes, as in `AlphaBetaAgent`.
+    So does a `move_generator`.
+    """
+    def __init__(self, max_depth, eval_fn=capture_diff, move_orderer=None,
+                 batch_eval_fn=None, quiescence_nodes=None, move_generator=None):
         Agent.__init__(self)
+        # Forward pruning keeps the best-ordered moves, so it needs an orderer.
+        assert move_generator is None or move_generator.top_k is None or \
+            move_orderer is not None
         self.max_depth = max_depth
         self.eval_fn = eval_fn
+        self.move_orderer = move_orderer
+        self.batch_eval_fn = batch_eval_fn
+        self.quiescence_nodes = quiescence_nodes
+        self.move_generator = move_generator
+        self.last_nodes = 0
 
     def select_move(self, game_state):
+        context = SearchContext(
+            orderer=self.move_orderer, batch_eval_fn=self.batch_eval_fn,
+            quiescence_nodes=self.quiescence_nodes, move_generator=self.move_generator)
+        moves = root_moves(game_state, self.move_generator)
+        if self.move_orderer is not None:
+            self.move_orderer.new_search()
+            moves = self.move_orderer.order(game_state, moves, 0)
         best_moves = []
         best_score = None
         # Loop over all legal moves.
-        for possible_move in game_state.legal_moves():
+        for possible_move in moves:
             # Calculate the game state if we select this move.
             next_state = game_state.apply_move(possible_move)
             # Since our opponent plays next, figure out their best
             # possible outcome from there.
-            opponent_best_outcome = best_result(next_state, self.max_depth, self.eval_fn)
+            opponent_best_outcome = best_result(
+                next_state, self.max_depth - 1, self.eval_fn, context)
             # Our outcome is the opposite of our opponent's outcome.
             our_best_outcome = -1 * opponent_best_outcome
             if (not best_moves) or our_best_outcome > best_score:
@@ -73,5 +119,6 @@ class DepthPrunedAgent(Agent):
             elif our_best_outcome == best_score:
                 # This is as good as our previous best move.
                 best_moves.append(possible_move)
+        self.last_nodes = context.nodes
         # For variety, randomly select among all equally good moves.
         return random.choice(best_moves)
@@ -1,17 +1,11 @@
-from dlgo.gotypes import Player, Point
+from dlgo.gotypes import Player
 
 
 def capture_diff(game_state):
-    black_stones = 0
-    white_stones = 0
-    for r in range(1, game_state.board.num_rows + 1):
-        for c in range(1, game_state.board.num_cols + 1):
-            p = Point(r, c)
-            color = game_state.board.get(p)
-            if color == Player.black:
-                black_stones += 1
-            elif color == Player.white:
-                white_stones += 1
+    # Доска сама поддерживает количество камней каждого цвета при установке и снятии камней,
+    # поэтому оценка позиции выполняется за O(1), без обхода всех точек доски
+    black_stones = game_state.board.num_stones(Player.black)
+    white_stones = game_state.board.num_stones(Player.white)
     # Расчет разницы между количеством черных и белых камней на доске. Результат будет совпадать
     # с разницей в количестве захваченных камней, если ни один из игроков не пасовал на более ранних этапах игры
     diff = black_stones - white_stones
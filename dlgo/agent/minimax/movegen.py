@@ -0,0 +1,110 @@
+from dlgo.agent.helpers import is_point_an_eye, move_class
+from dlgo.gotypes import Point
+
+__all__ = [
+    'MoveGenerator',
+]
+
+
+point_lists = {}
+
+
+def fills_own_eye(board, point, color):
+    """`is_point_an_eye` for an empty point of a goboard_fast board, using
+    its precomputed neighbor and corner tables.
+    """
+    for neighbor in board.neighbors(point):
+        if board.get(neighbor) != color:
+            return False
+    corners = board.corners(point)
+    friendly_corners = 0
+    for corner in corners:
+        if board.get(corner) == color:
+            friendly_corners += 1
+    if len(corners) < 4:
+        # На краю доски нужны все углы
+        return friendly_corners == len(corners)
+    return friendly_corners >= 3
+
+
+def root_moves(game_state, move_generator=None):
+    """The moves an agent chooses from: all legal moves, or those of the
+    move generator with resigning included.
+    """
+    if move_generator is None:
+        return game_state.legal_moves()
+    return move_generator.legal_moves(game_state, root=True)
+
+
+class MoveGenerator:
+    """Generates the candidate moves of a minimax search, which can be far
+    fewer than `legal_moves`.
+
+    Resigning is only offered at the root and passing is always offered.
+    With `skip_eyes`, plays that fill one of our own eyes are dropped, as
+    `RandomBot` does. With `near_stones`, only points within that many
+    rows and columns of a stone already on the board are considered (all
+    points while the board is empty). With `top_k`, nodes below the root
+    keep only their first `top_k` plays after move ordering (forward
+    pruning); this loses exactness, so it is off by default, and it
+    needs a `move_orderer` in the agent.
+    """
+    def __init__(self, skip_eyes=True, near_stones=None, top_k=None):
+        self.skip_eyes = skip_eyes
+        self.near_stones = near_stones
+        self.top_k = top_k
+
+    def candidate_points(self, board):
+        dim = (board.num_rows, board.num_cols)
+        if dim not in point_lists:
+            point_lists[dim] = [
+                Point(row=r, col=c)
+                for r in range(1, board.num_rows + 1)
+                for c in range(1, board.num_cols + 1)
+            ]
+        points = point_lists[dim]
+        if self.near_stones is None:
+            return points
+        stones = [point for point in points if board.get(point) is not None]
+        if not stones:
+            return points
+        # Точки на расстоянии не больше near_stones по строкам и столбцам от любого камня
+        distance = self.near_stones
+        near = set()
+        for stone in stones:
+            for r in range(max(1, stone.row - distance), min(board.num_rows, stone.row + distance) + 1):
+                for c in range(max(1, stone.col - distance), min(board.num_cols, stone.col + distance) + 1):
+                    near.add(Point(row=r, col=c))
+        return [point for point in points if point in near]
+
+    def legal_moves(self, game_state, root=False):
+        board = game_state.board
+        player = game_state.next_player
+        move_type = move_class(game_state)
+        # Доска goboard_fast хранит таблицы соседей и углов, глаз проверяется без создания точек
+        fills_eye = fills_own_eye if hasattr(board, 'corners') else is_point_an_eye
+        moves = []
+        for point in self.candidate_points(board):
+            if board.get(point) is not None:
+                continue
+            if self.skip_eyes and fills_eye(board, point, player):
+                continue
+            # Те же проверки, что в is_valid_move, без повторной проверки конца партии и точки
+            move = move_type.play(point)
+            if game_state.is_move_self_capture(player, move) or \
+                    game_state.does_move_violate_ko(player, move):
+                continue
+            moves.append(move)
+        moves.append(move_type.pass_turn())
+        if root:
+            moves.append(move_type.resign())
+        return moves
+
+    def prune(self, moves):
+        """Keep the first `top_k` plays of ordered moves, plus passing."""
+        if self.top_k is None:
+            return moves
+        plays = [move for move in moves if move.is_play]
+        if len(plays) <= self.top_k:
+            return moves
+        return plays[:self.top_k] + [move for move in moves if not move.is_play]
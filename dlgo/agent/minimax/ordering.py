@@ -0,0 +1,87 @@
+from dlgo.agent.helpers import same_move
+
+__all__ = [
+    'MoveOrderer',
+]
+
+TT_MOVE_SCORE = 10 ** 9
+CAPTURE_SCORE = 10 ** 7
+ATARI_SCORE = 10 ** 6
+KILLER_SCORE = 10 ** 5
+# Passing and resigning are searched after every stone placement.
+PASS_SCORE = -10 ** 9
+RESIGN_SCORE = -2 * 10 ** 9
+
+
+def tactical_score(board, player, point):
+    """Score a stone placement by what it does to adjacent strings:
+    captures first (bigger captures earlier), then moves that put an
+    opponent string in atari or save one of our strings from atari.
+    """
+    score = 0
+    seen = []
+    for neighbor in point.neighbors():
+        if not board.is_on_grid(neighbor):
+            continue
+        string = board.get_go_string(neighbor)
+        if string is None or string in seen:
+            continue
+        seen.append(string)
+        if string.color == player:
+            if string.num_liberties == 1:
+                score += ATARI_SCORE
+        elif string.num_liberties == 1:
+            score += CAPTURE_SCORE + len(string.stones)
+        elif string.num_liberties == 2:
+            score += ATARI_SCORE
+    return score
+
+
+class MoveOrderer:
+    """Orders the moves of an alpha-beta search so cutoffs come early.
+
+    Moves are sorted by: the transposition-table move, captures, ataris
+    and atari escapes, the killer moves of the current ply (moves that
+    recently caused a cutoff at this ply in a sibling subtree), then the
+    history heuristic (how often and how deep a point caused cutoffs
+    anywhere in the search). Pass and resign always come last.
+    """
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self.killers = {}
+        self.history = {}
+
+    def new_search(self):
+        """Forget the killers and age the history of the previous search."""
+        self.killers = {}
+        for point in self.history:
+            self.history[point] //= 2
+
+    def order(self, game_state, moves, ply, tt_move=None):
+        board = game_state.board
+        player = game_state.next_player
+        killers = self.killers.get(ply, ())
+
+        def score(move):
+            if tt_move is not None and same_move(move, tt_move):
+                return TT_MOVE_SCORE
+            if move.is_resign:
+                return RESIGN_SCORE
+            if move.is_pass:
+                return PASS_SCORE
+            result = tactical_score(board, player, move.point)
+            if move.point in killers:
+                result += KILLER_SCORE
+            return result + self.history.get(move.point, 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def record_cutoff(self, move, ply, depth):
+        """Remember a move that caused a beta cutoff."""
+        if not move.is_play:
+            return
+        killers = self.killers.setdefault(ply, [])
+        if move.point not in killers:
+            killers.insert(0, move.point)
+            del killers[self.num_killers:]
+        self.history[move.point] = self.history.get(move.point, 0) + depth * depth
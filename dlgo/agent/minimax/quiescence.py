@@ -0,0 +1,73 @@
+from dlgo.agent.helpers import move_class
+from dlgo.gotypes import Point
+
+__all__ = [
+    'quiescence_result',
+    'tactical_moves',
+]
+
+
+def tactical_moves(game_state):
+    """Return the legal captures and atari escapes of the player to move:
+    plays on the last liberty of a string in atari. Captures come first,
+    biggest first, then escapes of the biggest strings.
+    """
+    board = game_state.board
+    player = game_state.next_player
+    move_type = move_class(game_state)
+    captures = {}
+    escapes = {}
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            string = board.get_go_string(Point(row=r, col=c))
+            if string is None or string.num_liberties != 1:
+                continue
+            liberty = next(iter(string.liberties))
+            found = captures if string.color != player else escapes
+            found[liberty] = max(found.get(liberty, 0), len(string.stones))
+    # Взятие, которое заодно спасает свою цепочку, рассматривается один раз
+    for point in captures:
+        escapes.pop(point, None)
+    moves = []
+    for found in (captures, escapes):
+        for point in sorted(found, key=found.get, reverse=True):
+            move = move_type.play(point)
+            if game_state.is_valid_move(move):
+                moves.append(move)
+    return moves
+
+
+def _quiescence(game_state, alpha, beta, eval_fn, context):
+    context.visit()
+    # Оценка позиции, если игрок откажется от взятий (в го всегда можно спасовать)
+    best_so_far = eval_fn(game_state)
+    if best_so_far >= beta:
+        return best_so_far
+    if best_so_far > alpha:
+        alpha = best_so_far
+    for candidate_move in tactical_moves(game_state):
+        if context.quiescence_left <= 0:
+            break
+        context.quiescence_left -= 1
+        our_result = -_quiescence(
+            game_state.apply_move(candidate_move), -beta, -alpha, eval_fn, context)
+        if our_result > best_so_far:
+            best_so_far = our_result
+        if best_so_far > alpha:
+            alpha = best_so_far
+        if alpha >= beta:
+            break
+    return best_so_far
+
+
+def quiescence_result(game_state, alpha, beta, eval_fn, context):
+    """Evaluate a position at the search horizon by following only
+    captures and atari escapes until the position is quiet.
+
+    Fail-soft alpha-beta over the tactical moves, where the player to
+    move may always stop and take `eval_fn` instead. At most
+    `context.quiescence_nodes` moves are searched below the horizon
+    position.
+    """
+    context.quiescence_left = context.quiescence_nodes
+    return _quiescence(game_state, alpha, beta, eval_fn, context)
@@ -0,0 +1,292 @@
+import os
+import random
+
+import numpy as np
+
+from dlgo import zobrist
+from dlgo.agent import Agent
+from dlgo.agent.minimax.context import SearchContext
+from dlgo.gotypes import Player
+from dlgo.symmetry import symmetric_hashes, transform_point
+
+__all__ = [
+    'SolvedTable',
+    'SolverAgent',
+    'position_key',
+    'proof_number_search',
+    'solve',
+]
+
+# Codes mixed into a position key besides the stones.
+WHITE_TO_MOVE = 3064232788196233825
+AFTER_PASS = 9155125462778800512
+BOARD_SIZE = 8319533141203182053
+KEY_MASK = 2 ** 64 - 1
+
+TABLE_DTYPE = np.dtype([('key', '<u8'), ('won', 'u1')])
+
+
+def ko_point(game_state):
+    """Return the point where the player to move may not recapture a
+    single stone right away because it would repeat the previous
+    position, or None.
+    """
+    previous = game_state.previous_state
+    move = game_state.last_move
+    if move is None or not move.is_play:
+        return None
+    board = game_state.board
+    victim = game_state.next_player
+    if previous.board.num_stones(victim) - board.num_stones(victim) != 1:
+        return None
+    for neighbor in move.point.neighbors():
+        if board.is_on_grid(neighbor) and board.get(neighbor) is None and \
+                previous.board.get(neighbor) == victim:
+            recapture = game_state.apply_move(type(move).play(neighbor))
+            if recapture.board.zobrist_hash() == previous.board.zobrist_hash():
+                return neighbor
+            return None
+    return None
+
+
+def position_key(game_state):
+    """Return a 64-bit key of the position that is the same for all
+    symmetric boards: the smallest Zobrist hash of the board and the ko
+    point over the board's symmetries, combined with the board size, the
+    player to move and whether the last move was a pass (a second pass
+    ends the game).
+
+    Bans of longer cycles (superko) depend on the whole history and are
+    not part of the key.
+    """
+    board = game_state.board
+    dim = (board.num_rows, board.num_cols)
+    hashes = symmetric_hashes(board)
+    ko = ko_point(game_state)
+    if ko is not None:
+        # Запрет на немедленное повторное взятие отмечается отдельным кодом точки
+        hashes = [
+            code ^ zobrist.HASH_CODE[image, Player.black] ^ zobrist.HASH_CODE[image, Player.white]
+            for code, image in zip(hashes, (
+                transform_point(ko, transform, dim) for transform in range(len(hashes))))]
+    key = min(hashes)
+    key ^= (BOARD_SIZE * (board.num_rows * 32 + board.num_cols)) & KEY_MASK
+    if game_state.next_player == Player.white:
+        key ^= WHITE_TO_MOVE
+    if game_state.last_move is not None and game_state.last_move.is_pass:
+        key ^= AFTER_PASS
+    return key
+
+
+class SolvedTable:
+    """Results of solved positions: whether the player to move wins.
+
+    New results are kept in a dict. `save` merges them with the results
+    already on disk into a file of (key, won) records sorted by key,
+    9 bytes per position; the file is memory-mapped when the table is
+    created, so looking up a position only reads the pages that the
+    binary search touches.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.memo = {}
+        self._disk = None
+        self._disk_keys = None
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        self._disk = np.load(self.path, mmap_mode='r')
+        self._disk_keys = self._disk['key']
+
+    def __len__(self):
+        num_disk = len(self._disk) if self._disk is not None else 0
+        return num_disk + len(self.memo)
+
+    def get(self, key):
+        """Return True or False for a solved position, None otherwise."""
+        won = self.memo.get(key)
+        if won is not None or self._disk is None:
+            return won
+        index = np.searchsorted(self._disk_keys, np.uint64(key))
+        if index < len(self._disk_keys) and self._disk_keys[index] == key:
+            return bool(self._disk['won'][index])
+        return None
+
+    def put(self, key, won):
+        self.memo[key] = won
+
+    def save(self, path=None):
+        """Write all results to `path` (by default the table's own file)
+        and memory-map the written file.
+        """
+        if path is not None:
+            self.path = path
+        records = np.empty(len(self.memo), dtype=TABLE_DTYPE)
+        records['key'] = np.fromiter(self.memo.keys(), dtype=np.uint64, count=len(self.memo))
+        records['won'] = np.fromiter(self.memo.values(), dtype=np.uint8, count=len(self.memo))
+        if self._disk is not None:
+            records = np.concatenate([np.asarray(self._disk), records])
+        records = records[np.argsort(records['key'], kind='stable')]
+        # При совпадении ключей сохраняется одна запись
+        if len(records):
+            keep = np.ones(len(records), dtype=bool)
+            keep[1:] = records['key'][1:] != records['key'][:-1]
+            records = records[keep]
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.save(f, records)
+        os.replace(temp_path, self.path)
+        self.memo = {}
+        self._load()
+
+
+def solver_moves(game_state):
+    """Legal moves worth trying: resigning never wins, and passing is
+    tried first after the opponent passed (it ends the game) and last
+    otherwise.
+    """
+    moves = [move for move in game_state.legal_moves() if not move.is_resign]
+    if game_state.last_move is not None and game_state.last_move.is_pass:
+        return moves[-1:] + moves[:-1]
+    return moves
+
+
+def solve(game_state, table, context=None):
+    """Return True if the player to move wins with best play.
+
+    A depth-first search that stops at the first winning move and
+    remembers every solved position in `table`; positions that are
+    symmetric to a solved one are answered from the table.
+    """
+    if context is not None:
+        context.visit()
+    # Если игра окончена, уже известен победитель
+    if game_state.is_over():
+        return game_state.winner() == game_state.next_player
+    key = position_key(game_state)
+    won = table.get(key)
+    if won is not None:
+        return won
+    won = False
+    for candidate_move in solver_moves(game_state):
+        # Достаточно одного хода, после которого противник проигрывает
+        if not solve(game_state.apply_move(candidate_move), table, context):
+            won = True
+            break
+    table.put(key, won)
+    return won
+
+
+class PNSNode:
+    def __init__(self, game_state, parent=None):
+        self.game_state = game_state
+        self.parent = parent
+        self.children = None
+        # Proof number: how many leaves must be solved to show that the
+        # player to move wins; disproof number: to show that they lose.
+        self.proof = 1
+        self.disproof = 1
+
+    def set_result(self, won):
+        if won:
+            self.proof, self.disproof = 0, float('inf')
+        else:
+            self.proof, self.disproof = float('inf'), 0
+
+    def update(self):
+        # Ход игрока выигрывает, если хотя бы один потомок проигрывает для противника
+        self.proof = min(child.disproof for child in self.children)
+        self.disproof = sum(child.proof for child in self.children)
+
+
+def proof_number_search(game_state, table, max_nodes=None, context=None):
+    """Proof-number search for the winner of `game_state`.
+
+    Expands the most-proving leaf until the root is proved or disproved
+    and returns True or False, or None if `max_nodes` positions were
+    expanded first. Positions found in `table` are solved leaves, and the
+    solved nodes of the search tree are added to it.
+    """
+    root = PNSNode(game_state)
+    num_nodes = 0
+    while root.proof != 0 and root.disproof != 0:
+        if max_nodes is not None and num_nodes >= max_nodes:
+            return None
+        # Спуск к наиболее доказывающему листу
+        node = root
+        while node.children is not None:
+            node = min(node.children, key=lambda child: child.disproof)
+        node.children = []
+        for candidate_move in solver_moves(node.game_state):
+            num_nodes += 1
+            if context is not None:
+                context.visit()
+            child = PNSNode(node.game_state.apply_move(candidate_move), node)
+            child_state = child.game_state
+            if child_state.is_over():
+                child.set_result(child_state.winner() == child_state.next_player)
+            else:
+                won = table.get(position_key(child_state))
+                if won is not None:
+                    child.set_result(won)
+            node.children.append(child)
+        # Обновление чисел доказательства вверх по дереву
+        while node is not None:
+            node.update()
+            if node.proof == 0 or node.disproof == 0:
+                table.put(position_key(node.game_state), node.proof == 0)
+            node = node.parent
+    return root.proof == 0
+
+
+class SolverAgent(Agent):
+    """Plays tiny boards (2x2 to 5x5) by solving the game.
+
+    Positions are solved by `solve`, or by `proof_number_search` with
+    `use_pns`, and remembered in a `SolvedTable` keyed by `position_key`,
+    so symmetric positions are solved once. With `cache_path`, the
+    results solved in earlier runs are memory-mapped from that file when
+    the agent is created and `save()` adds the new ones. Only boards up
+    to 3x3 can be solved from the empty board in reasonable time; larger
+    boards are practical from positions with few empty points.
+
+    Like any transposition table, the solved table ignores how a
+    position was reached: the simple ko is part of the key, but a
+    position is answered with the superko bans of the line it was first
+    solved in. On boards this small, where captures often clear most of
+    the board, a game can reach a position whose superko bans differ,
+    and the agent's choice there is not guaranteed to be perfect.
+    """
+    def __init__(self, cache_path=None, use_pns=False, max_nodes=None):
+        Agent.__init__(self)
+        self.table = SolvedTable(cache_path)
+        self.use_pns = use_pns
+        self.max_nodes = max_nodes
+        self.last_nodes = 0
+
+    def solve(self, game_state, context):
+        """Return True if the player to move wins, or None if the proof
+        number search ran out of nodes.
+        """
+        if game_state.is_over():
+            return game_state.winner() == game_state.next_player
+        if self.use_pns:
+            return proof_number_search(game_state, self.table, self.max_nodes, context)
+        return solve(game_state, self.table, context)
+
+    def select_move(self, game_state):
+        context = SearchContext()
+        moves = solver_moves(game_state)
+        for possible_move in moves:
+            next_state = game_state.apply_move(possible_move)
+            # Ход выигрывает, если позиция проиграна для противника
+            if self.solve(next_state, context) is False:
+                self.last_nodes = context.nodes
+                return possible_move
+        self.last_nodes = context.nodes
+        return random.choice(moves)
+
+    def save(self):
+        if self.table.path is not None:
+            self.table.save()
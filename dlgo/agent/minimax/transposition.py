@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from dlgo.agent.helpers import same_move
+from dlgo.symmetry import canonical_hash, inverse_transform, transform_move
+
+__all__ = [
+    'Bound',
+    'TranspositionTable',
+]
+
+
+class Bound:
+    """How a stored score relates to the true value of a position."""
+    exact = 0
+    # The search failed high: the true value is at least the score.
+    lower = 1
+    # The search failed low: the true value is at most the score.
+    upper = 2
+
+
+TTEntry = namedtuple('TTEntry', 'key depth score bound best_move generation')
+
+
+class TranspositionTable:
+    """Fixed-size table of alpha-beta results keyed by the Zobrist hash of
+    the board plus the player to move.
+
+    The table is a list of `num_slots` slots indexed by the key's hash, so
+    its memory use never grows. A slot is overwritten when it is empty,
+    holds the same position, holds an entry from an earlier search, or
+    holds a shallower search of another position (depth-preferred
+    replacement).
+
+    With `symmetric`, positions are keyed by the canonical hash of the
+    board over its rotations and reflections, so symmetric positions
+    share one entry; best moves are stored in the canonical orientation
+    and mapped back when probed.
+    """
+    def __init__(self, num_slots=2 ** 18, symmetric=False):
+        self.num_slots = num_slots
+        self.symmetric = symmetric
+        self._slots = [None] * num_slots
+        self.generation = 0
+        self.hits = 0
+        self.probes = 0
+
+    def key(self, game_state):
+        return self._locate(game_state)[0]
+
+    def _locate(self, game_state):
+        """Return the key of the position and the symmetry that maps it
+        to the stored orientation.
+        """
+        board = game_state.board
+        if not self.symmetric:
+            return (game_state.next_player, board.zobrist_hash()), 0
+        code, transform = canonical_hash(board)
+        return (game_state.next_player, code), transform
+
+    def new_search(self):
+        """Mark existing entries as stale so new results may replace them."""
+        self.generation += 1
+
+    def probe(self, game_state):
+        """Return the entry stored for this position, or None."""
+        self.probes += 1
+        key, transform = self._locate(game_state)
+        entry = self._slots[hash(key) % self.num_slots]
+        if entry is None or entry.key != key:
+            return None
+        self.hits += 1
+        if transform and entry.best_move is not None:
+            board = game_state.board
+            entry = entry._replace(best_move=transform_move(
+                entry.best_move, inverse_transform(transform), (board.num_rows, board.num_cols)))
+        return entry
+
+    def store(self, game_state, depth, score, bound, best_move):
+        key, transform = self._locate(game_state)
+        if transform and best_move is not None:
+            board = game_state.board
+            best_move = transform_move(best_move, transform, (board.num_rows, board.num_cols))
+        index = hash(key) % self.num_slots
+        old = self._slots[index]
+        if old is not None and old.key != key and \
+                old.generation == self.generation and old.depth > depth:
+            return
+        self._slots[index] = TTEntry(key, depth, score, bound, best_move, self.generation)
+
+    def clear(self):
+        self._slots = [None] * self.num_slots
+        self.hits = 0
+        self.probes = 0
+
+
+def order_tt_move(moves, entry):
+    """Move the table's best move for this position to the front."""
+    if entry is None or entry.best_move is None:
+        return moves
+    for i, move in enumerate(moves):
+        if same_move(move, entry.best_move):
+            return [move] + moves[:i] + moves[i + 1:]
+    return moves
@@ -0,0 +1,64 @@
+import time
+
+__all__ = [
+    'TimeControl',
+]
+
+
+class TimeControl:
+    """Thinking-time allocation for a search agent.
+
+    Two modes are supported:
+    - `move_time_ms`: a fixed budget per move. Time left unused on a move
+      is banked and added to the budget of the following moves (at most
+      `max_bank_ms` is kept).
+    - `game_time_ms`: a total clock for the whole game. Each move gets the
+      remaining clock divided by the expected number of moves still to play,
+      so time saved on easy moves is automatically spent on later ones.
+    """
+    def __init__(self, move_time_ms=None, game_time_ms=None,
+                 max_bank_ms=None, min_moves_to_go=10, safety_ms=5):
+        assert (move_time_ms is None) ^ (game_time_ms is None)
+        self.move_time_ms = move_time_ms
+        self.game_time_ms = game_time_ms
+        self.max_bank_ms = max_bank_ms
+        self.min_moves_to_go = min_moves_to_go
+        self.safety_ms = safety_ms
+        self.reset()
+
+    def reset(self):
+        """Start a new game: empty the bank and refill the game clock."""
+        self.bank_ms = 0.0
+        self.remaining_ms = self.game_time_ms
+        self.moves_played = 0
+
+    def moves_to_go(self, game_state):
+        # A game on an N-point board lasts roughly N moves, half of them ours.
+        board = game_state.board
+        expected = board.num_rows * board.num_cols // 2 - self.moves_played
+        return max(self.min_moves_to_go, expected)
+
+    def budget_ms(self, game_state):
+        """Return the number of milliseconds we may think on this move."""
+        if self.move_time_ms is not None:
+            budget = self.move_time_ms + self.bank_ms
+        else:
+            budget = self.remaining_ms / self.moves_to_go(game_state)
+        return max(0.0, budget - self.safety_ms)
+
+    def start_move(self, game_state):
+        """Return the `time.perf_counter()` deadline for this move."""
+        self._move_start = time.perf_counter()
+        return self._move_start + self.budget_ms(game_state) / 1000.0
+
+    def end_move(self):
+        """Charge the time spent since `start_move` to the clock."""
+        elapsed_ms = (time.perf_counter() - self._move_start) * 1000.0
+        self.moves_played += 1
+        if self.move_time_ms is not None:
+            self.bank_ms = max(0.0, self.bank_ms + self.move_time_ms - elapsed_ms)
+            if self.max_bank_ms is not None:
+                self.bank_ms = min(self.bank_ms, self.max_bank_ms)
+        else:
+            self.remaining_ms = max(0.0, self.remaining_ms - elapsed_ms)
+        return elapsed_ms
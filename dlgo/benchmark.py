@@ -0,0 +1,295 @@
+import json
+import platform
+import random
+import statistics
+import time
+from collections import namedtuple
+
+from dlgo import goboard_fast, goboard_normal, goboard_slow
+from dlgo.agent.helpers import is_point_an_eye
+from dlgo.agent.mcts.mcts import MCTSAgent
+from dlgo.agent.minimax.alphabeta import AlphaBetaAgent
+from dlgo.gotypes import Point
+from dlgo.scoring import compute_game_result
+
+__all__ = [
+    'BENCHMARKS',
+    'BOARD_SIZES',
+    'ENGINES',
+    'BenchmarkCase',
+    'BenchmarkResult',
+    'FAST_ONLY',
+    'calibrate',
+    'load_calibration',
+    'load_results',
+    'make_case',
+    'merge_results',
+    'random_playout',
+    'run_benchmark',
+    'run_suite',
+    'save_results',
+]
+
+ENGINES = {
+    'slow': goboard_slow,
+    'normal': goboard_normal,
+    'fast': goboard_fast,
+}
+BOARD_SIZES = (9, 13, 19)
+# Доли партии, после которых берутся позиции для legal_moves, is_valid_move и подсчета очков
+POSITION_FRACTIONS = (0.1, 0.3, 0.5, 0.7, 0.9)
+
+
+def random_playout(engine, board_size, rng, max_moves=None):
+    """Play a game of random moves that do not fill own eyes, like
+    `RandomBot`, with the engine module `engine` and the `random.Random`
+    instance `rng`. Return the final state and the list of points played,
+    with None for a pass.
+    """
+    game = engine.GameState.new_game(board_size)
+    points = [Point(row=r, col=c)
+              for r in range(1, board_size + 1)
+              for c in range(1, board_size + 1)]
+    if max_moves is None:
+        max_moves = 3 * len(points)
+    played = []
+    while not game.is_over() and len(played) < max_moves:
+        # Точки перебираются в случайном порядке до первого допустимого хода
+        rng.shuffle(points)
+        move = engine.Move.pass_turn()
+        for point in points:
+            candidate = engine.Move.play(point)
+            if game.is_valid_move(candidate) and \
+                    not is_point_an_eye(game.board, point, game.next_player):
+                move = candidate
+                break
+        game = game.apply_move(move)
+        played.append(move.point)
+    return game, played
+
+
+# The input of the benchmarks of one engine and board size: the moves of
+# a fixed-seed random game, the states reached after some of them, and
+# the seed of the playout benchmark.
+BenchmarkCase = namedtuple('BenchmarkCase', 'engine board_size moves positions seed')
+
+
+def make_case(engine_name, board_size, seed=0):
+    """Build the `BenchmarkCase` of an engine. The move sequence only
+    depends on `board_size` and `seed`, so all engines replay the same game.
+    """
+    engine = ENGINES[engine_name]
+    _, points = random_playout(goboard_fast, board_size, random.Random(seed))
+    moves = [engine.Move.pass_turn() if point is None else engine.Move.play(point)
+             for point in points]
+    plies = {int(fraction * len(moves)) for fraction in POSITION_FRACTIONS}
+    positions = []
+    game = engine.GameState.new_game(board_size)
+    for ply, move in enumerate(moves):
+        if ply in plies:
+            positions.append(game)
+        game = game.apply_move(move)
+    return BenchmarkCase(engine_name, board_size, moves, positions, seed)
+
+
+def bench_apply_move(case):
+    game = ENGINES[case.engine].GameState.new_game(case.board_size)
+    for move in case.moves:
+        game = game.apply_move(move)
+    return len(case.moves)
+
+
+def bench_legal_moves(case):
+    for game in case.positions:
+        game.legal_moves()
+    return len(case.positions)
+
+
+def bench_is_valid_move(case):
+    engine = ENGINES[case.engine]
+    ops = 0
+    for game in case.positions:
+        for r in range(1, case.board_size + 1):
+            for c in range(1, case.board_size + 1):
+                game.is_valid_move(engine.Move.play(Point(row=r, col=c)))
+                ops += 1
+    return ops
+
+
+def bench_scoring(case):
+    for game in case.positions:
+        compute_game_result(game)
+    return len(case.positions)
+
+
+def bench_playout(case):
+    random_playout(ENGINES[case.engine], case.board_size, random.Random(case.seed))
+    return 1
+
+
+MCTS_ROUNDS = 10
+ALPHABETA_DEPTH = 2
+
+
+def bench_mcts_rollout(case):
+    random.seed(case.seed)
+    bot = MCTSAgent(MCTS_ROUNDS, 1.4)
+    # Поздняя позиция: случайные партии из нее короче, и замер не затягивается
+    bot.select_move(case.positions[-1])
+    return bot.last_stats.rounds
+
+
+def bench_alphabeta_node(case):
+    bot = AlphaBetaAgent(ALPHABETA_DEPTH)
+    bot.select_move(case.positions[2])
+    return bot.last_nodes
+
+
+# Each benchmark runs over a case and returns the number of operations
+# it performed: moves applied, calls made, playouts finished, MCTS
+# rollouts or alpha-beta nodes searched.
+BENCHMARKS = {
+    'apply_move': bench_apply_move,
+    'legal_moves': bench_legal_moves,
+    'is_valid_move': bench_is_valid_move,
+    'scoring': bench_scoring,
+    'playout': bench_playout,
+    'mcts_rollout': bench_mcts_rollout,
+    'alphabeta_node': bench_alphabeta_node,
+}
+# The agents run on any engine, but on goboard_slow and goboard_normal a
+# single search takes 20 to 100 seconds on 19x19, so these only run on
+# goboard_fast.
+FAST_ONLY = {'mcts_rollout', 'alphabeta_node'}
+
+# `calibration` is the `calibrate` score measured just before the
+# benchmark, if `run_suite` was asked for it.
+BenchmarkResult = namedtuple(
+    'BenchmarkResult',
+    'engine board_size benchmark ops ops_per_sec ops_per_sec_stdev runs calibration',
+    defaults=(None,))
+
+
+def run_benchmark(name, case, repeat=5, min_time=0.1):
+    """Time `repeat` runs of a benchmark after one warm-up run and
+    return a `BenchmarkResult` with the mean and standard deviation of
+    the operations per second. A run repeats the benchmark until it has
+    taken at least `min_time` seconds, so that fast engines are not
+    timed over a few microseconds.
+    """
+    benchmark = BENCHMARKS[name]
+    benchmark(case)
+    runs = []
+    for i in range(repeat):
+        ops = 0
+        start = time.perf_counter()
+        while True:
+            ops += benchmark(case)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        runs.append(ops / elapsed)
+    stdev = statistics.stdev(runs) if len(runs) > 1 else 0.0
+    return BenchmarkResult(
+        case.engine, case.board_size, name, ops, statistics.mean(runs), stdev, runs)
+
+
+def run_suite(engines=None, board_sizes=BOARD_SIZES, benchmarks=None, repeat=5,
+              min_time=0.1, seed=0, on_result=None, calibrate_each=False):
+    """Run every benchmark for every engine and board size and return the
+    list of `BenchmarkResult`s. `on_result(result)` is called as each one
+    finishes. With `calibrate_each`, the machine speed is measured again
+    before every benchmark, so that results can be corrected for the
+    machine getting slower or faster during the suite.
+    """
+    results = []
+    for board_size in board_sizes:
+        for engine_name in engines or ENGINES:
+            case = make_case(engine_name, board_size, seed)
+            for name in benchmarks or BENCHMARKS:
+                if name in FAST_ONLY and engine_name != 'fast':
+                    continue
+                calibration = calibrate(3, min_time / 2) if calibrate_each else None
+                result = run_benchmark(name, case, repeat, min_time)
+                result = result._replace(calibration=calibration)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    return results
+
+
+def calibrate(repeat=5, min_time=0.1):
+    """Measure the speed of this machine and interpreter as the best
+    number of iterations per second of a fixed pure-Python loop that does
+    the kind of work the board engines do (tuple hashing, dict and set
+    lookups). Throughputs divided by it can be compared across machines.
+    """
+    best = 0.0
+    for i in range(repeat):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            grid = {}
+            seen = set()
+            for r in range(1, 20):
+                for c in range(1, 20):
+                    point = Point(row=r, col=c)
+                    grid[point] = (r + c) % 3
+                    if grid.get(Point(row=r - 1, col=c)) == grid[point]:
+                        seen.add(point)
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, loops / elapsed)
+    return best
+
+
+def merge_results(passes):
+    """Merge several passes of `run_suite` run with `calibrate_each` into
+    one list of results whose runs are the runs of all passes and whose
+    calibration is the best one measured for the benchmark. Like the
+    calibration itself, the best of many runs is what a regression check
+    should compare: noise only ever makes a run slower.
+    """
+    by_key = {}
+    for results in passes:
+        for result in results:
+            key = (result.engine, result.board_size, result.benchmark)
+            by_key.setdefault(key, []).append(result)
+    merged = []
+    for results in by_key.values():
+        runs = [run for result in results for run in result.runs]
+        stdev = statistics.stdev(runs) if len(runs) > 1 else 0.0
+        merged.append(results[0]._replace(
+            ops_per_sec=statistics.mean(runs), ops_per_sec_stdev=stdev,
+            runs=runs, calibration=max(result.calibration for result in results)))
+    return merged
+
+
+def save_results(results, path, repeat=None, min_time=None, seed=None, calibration=None):
+    """Write results to a JSON file together with the machine they were
+    measured on and its `calibrate` score."""
+    data = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'calibration': calibration,
+        'repeat': repeat,
+        'min_time': min_time,
+        'seed': seed,
+        'results': [result._asdict() for result in results],
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    return [BenchmarkResult(**result) for result in data['results']]
+
+
+def load_calibration(path):
+    with open(path) as f:
+        return json.load(f).get('calibration')
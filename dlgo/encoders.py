@@ -0,0 +1,38 @@
+import numpy as np
+
+from dlgo.gotypes import Player, Point
+
+__all__ = [
+    'encode_board',
+    'encode_boards',
+]
+
+STONE_VALUES = {
+    Player.black: 1,
+    Player.white: -1,
+}
+
+
+def encode_board(board):
+    """Return a (rows, cols) int8 array of the board: 1 for black stones,
+    -1 for white stones and 0 for empty points. Boards that keep such an
+    array up to date (goboard_fast) are copied without visiting points.
+    """
+    if hasattr(board, 'stone_array'):
+        return board.stone_array().copy()
+    encoded = np.zeros((board.num_rows, board.num_cols), dtype=np.int8)
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            color = board.get(Point(row=r, col=c))
+            if color is not None:
+                encoded[r - 1, c - 1] = STONE_VALUES[color]
+    return encoded
+
+
+def encode_boards(boards):
+    """Stack the encodings of same-sized boards into an (N, rows, cols)
+    int8 array.
+    """
+    return np.stack([
+        board.stone_array() if hasattr(board, 'stone_array') else encode_board(board)
+        for board in boards])
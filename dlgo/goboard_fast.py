@@ -1,7 +1,9 @@
 import copy
+import sys
+import numpy as np
 from dlgo.gotypes import Player, Point
 from dlgo.scoring import compute_game_result
-from dlgo import zobrist
+from dlgo import instrument, symmetry, zobrist
 from dlgo.utils import MoveAge
 
 __all__ = [
@@ -10,6 +12,11 @@ __all__ = [
     'Move',
 ]
 
+STONE_VALUES = {
+    Player.black: 1,
+    Player.white: -1,
+}
+
 neighbor_tables = {}
 corner_tables = {}
 
@@ -97,6 +104,15 @@ class Board:
         self.num_cols = num_cols
         self._grid = {}
         self._hash = zobrist.EMPTY_BOARD
+        # Stone counts per color, kept up to date as stones are placed and captured.
+        self._stone_counts = {Player.black: 0, Player.white: 0}
+        # The board as an int8 array: 1 for black, -1 for white, 0 for empty.
+        # Built on the first call to stone_array(), then kept up to date.
+        self._stones = None
+        # Zobrist hashes of the board under each of its symmetries, built on
+        # the first call to symmetric_hashes(), then kept up to date.
+        self._symmetric_hashes = None
+        self._hash_deltas = None
 
         global neighbor_tables
         dim = (num_rows, num_cols)
@@ -142,10 +158,15 @@ class Board:
             new_string = new_string.merged_with(same_color_string)
         for new_string_point in new_string.stones:
             self._grid[new_string_point] = new_string
+        self._stone_counts[player] += 1
+        if self._stones is not None:
+            self._stones[point.row - 1, point.col - 1] = STONE_VALUES[player]
         # Remove empty-point hash code.
         self._hash ^= zobrist.HASH_CODE[point, None]
         # Add filled point hash code.
         self._hash ^= zobrist.HASH_CODE[point, player]
+        if self._symmetric_hashes is not None:
+            self._update_symmetric_hashes(point, player)
 
         # 2. Reduce liberties of any adjacent strings of the opposite
         #    color.
@@ -173,10 +194,15 @@ class Board:
                 if neighbor_string is not string:
                     self._replace_string(neighbor_string.with_liberty(point))
             self._grid[point] = None
+            if self._stones is not None:
+                self._stones[point.row - 1, point.col - 1] = 0
             # Remove filled point hash code.
             self._hash ^= zobrist.HASH_CODE[point, string.color]
             # Add empty point hash code.
             self._hash ^= zobrist.HASH_CODE[point, None]
+            if self._symmetric_hashes is not None:
+                self._update_symmetric_hashes(point, string.color)
+        self._stone_counts[string.color] -= len(string.stones)
 
     def is_self_capture(self, player, point):
         friendly_strings = []
@@ -233,6 +259,41 @@ class Board:
             return None
         return string
 
+    def num_stones(self, player):
+        """Return the number of stones the player has on the board."""
+        return self._stone_counts[player]
+
+    def _update_symmetric_hashes(self, point, color):
+        deltas = self._hash_deltas[point, color]
+        self._symmetric_hashes = [
+            code ^ delta for code, delta in zip(self._symmetric_hashes, deltas)]
+
+    def symmetric_hashes(self):
+        """Return the Zobrist hashes of the board under each symmetry, in
+        the order of `dlgo.symmetry.TRANSFORMS`.
+        """
+        if self._symmetric_hashes is None:
+            # Boards that never need the symmetries don't pay for them in place_stone.
+            dim = (self.num_rows, self.num_cols)
+            self._hash_deltas = symmetry.hash_deltas(dim)
+            self._symmetric_hashes = [zobrist.EMPTY_BOARD] * symmetry.num_symmetries(dim)
+            for point, string in self._grid.items():
+                if string is not None:
+                    self._update_symmetric_hashes(point, string.color)
+        return self._symmetric_hashes
+
+    def stone_array(self):
+        """Return the board as a (rows, cols) int8 array with 1 for black
+        stones, -1 for white stones and 0 for empty points. The array is
+        kept up to date by the board and must not be modified.
+        """
+        if self._stones is None:
+            self._stones = np.zeros((self.num_rows, self.num_cols), dtype=np.int8)
+            for point, string in self._grid.items():
+                if string is not None:
+                    self._stones[point.row - 1, point.col - 1] = STONE_VALUES[string.color]
+        return self._stones
+
     def __eq__(self, other):
         return isinstance(other, Board) and \
             self.num_rows == other.num_rows and \
@@ -240,11 +301,22 @@ class Board:
             self._hash() == other._hash()
 
     def __deepcopy__(self, memodict={}):
-        copied = Board(self.num_rows, self.num_cols)
+        # Skip __init__: the neighbor tables are shared and no empty grid is built.
+        copied = Board.__new__(Board)
+        copied.num_rows = self.num_rows
+        copied.num_cols = self.num_cols
         # Can do a shallow copy b/c the dictionary maps tuples
         # (immutable) to GoStrings (also immutable)
         copied._grid = copy.copy(self._grid)
         copied._hash = self._hash
+        copied._stone_counts = self._stone_counts.copy()
+        copied._stones = None if self._stones is None else self._stones.copy()
+        # The hash list is replaced, never changed in place, so copies can share it.
+        copied._symmetric_hashes = self._symmetric_hashes
+        copied._hash_deltas = self._hash_deltas
+        copied.neighbor_table = self.neighbor_table
+        copied.corner_table = self.corner_table
+        copied.move_ages = MoveAge(copied)
         return copied
 
     def zobrist_hash(self):
@@ -388,4 +460,8 @@ class GameState():
         if self.last_move.is_resign:
             return self.next_player
         game_result = compute_game_result(self)
-        return game_result.winner
\ No newline at end of file
+        return game_result.winner
+
+
+if instrument.ENABLED:
+    instrument.instrument_engine(sys.modules[__name__])
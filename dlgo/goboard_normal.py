@@ -1,5 +1,6 @@
+import sys
 from copy import deepcopy
-from dlgo import zobrist
+from dlgo import instrument, symmetry, zobrist
 from dlgo.gotypes import Player, Point
 from dlgo.scoring import compute_game_result
 
@@ -74,6 +75,11 @@ class Board:
         self.num_cols = num_cols
         self._grid = {}
         self._hash = zobrist.EMPTY_BOARD
+        # Stone counts per color, kept up to date as stones are placed and captured.
+        self._stone_counts = {Player.black: 0, Player.white: 0}
+        # Zobrist hashes of the board under each of its symmetries, built on
+        # the first call to symmetric_hashes(), then kept up to date.
+        self._symmetric_hashes = None
 
     def is_on_grid(self, point):
         return 1 <= point.row <= self.num_rows and 1 <= point.col <= self.num_cols
@@ -108,7 +114,12 @@ class Board:
                 if neighbor_string is not string:
                     self._replace_string(neighbor_string.with_liberty(point))
             self._grid[point] = None
+            # Remove filled point hash code and add back the empty point one.
             self._hash ^= zobrist.HASH_CODE[point, string.color]
+            self._hash ^= zobrist.HASH_CODE[point, None]
+            if self._symmetric_hashes is not None:
+                self._update_symmetric_hashes(point, string.color)
+        self._stone_counts[string.color] -= len(string.stones)
 
     # This new helper method updates our Go board grid.
     def _replace_string(self, new_string):
@@ -140,9 +151,12 @@ class Board:
             new_string = new_string.merged_with(same_color_string)
         for new_string_point in new_string.stones:
             self._grid[new_string_point] = new_string
+        self._stone_counts[player] += 1
         self._hash ^= zobrist.HASH_CODE[point, None]
         # With Zobrist hashing, you need to unapply the hash for this move.
         self._hash ^= zobrist.HASH_CODE[point, player]
+        if self._symmetric_hashes is not None:
+            self._update_symmetric_hashes(point, player)
         # Reducing the number of degrees of freedom of neighboring chains of stones of the opposite color.
         for other_color_string in adjacent_opposite_color:
             # Reducing the number of degrees of freedom of any adjacent chains of stones of a different color.
@@ -157,6 +171,30 @@ class Board:
             if other_color_string.num_liberties == 0:
                 self._remove_string(other_color_string)
 
+    def _update_symmetric_hashes(self, point, color):
+        # Unlike goboard_fast, the delta table is not kept on the board:
+        # boards here are copied with deepcopy, which would copy it too.
+        deltas = symmetry.hash_deltas((self.num_rows, self.num_cols))[point, color]
+        self._symmetric_hashes = [
+            code ^ delta for code, delta in zip(self._symmetric_hashes, deltas)]
+
+    def symmetric_hashes(self):
+        """Return the Zobrist hashes of the board under each symmetry, in
+        the order of `dlgo.symmetry.TRANSFORMS`.
+        """
+        if self._symmetric_hashes is None:
+            # Boards that never need the symmetries don't pay for them in place_stone.
+            self._symmetric_hashes = [zobrist.EMPTY_BOARD] * symmetry.num_symmetries(
+                (self.num_rows, self.num_cols))
+            for point, string in self._grid.items():
+                if string is not None:
+                    self._update_symmetric_hashes(point, string.color)
+        return self._symmetric_hashes
+
+    def num_stones(self, player):
+        """Return the number of stones the player has on the board."""
+        return self._stone_counts[player]
+
     def __eq__(self, other):
         return isinstance(other, Board) and \
                self.num_rows == other.num_rows and \
@@ -257,3 +295,7 @@ class GameState:
             return self.next_player
         game_result = compute_game_result(self)
         return game_result.winner
+
+
+if instrument.ENABLED:
+    instrument.instrument_engine(sys.modules[__name__])
@@ -1,4 +1,6 @@
+import sys
 from copy import deepcopy
+from dlgo import instrument
 from dlgo.gotypes import Player, Point
 from dlgo.scoring import compute_game_result
 
@@ -67,6 +69,8 @@ class Board:
         self.num_rows = num_rows
         self.num_cols = num_cols
         self._grid = {}
+        # Количество камней каждого цвета на доске, обновляется при каждом ходе.
+        self._stone_counts = {Player.black: 0, Player.white: 0}
 
     def is_on_grid(self, point):
         return 1 <= point.row <= self.num_rows and 1 <= point.col <= self.num_cols
@@ -95,7 +99,9 @@ class Board:
                     continue
                 if neighbor_string is not string:
                     neighbor_string.add_liberty(point)
-            self._grid[point] = None
+            # Точка удаляется из словаря, чтобы доска совпадала с такой же доской без взятий.
+            del self._grid[point]
+        self._stone_counts[string.color] -= len(string.stones)
 
     # Сначала исследуются непосредственные соседи конкретной точки.
     def place_stone(self, player, point):
@@ -122,6 +128,7 @@ class Board:
             new_string = new_string.merged_with(same_color_string)
         for new_string_point in new_string.stones:
             self._grid[new_string_point] = new_string
+        self._stone_counts[player] += 1
         # Уменьшение количества степеней свободы соседних цепочек камней противоположного цвета.
         for other_color_string in adjacent_opposite_color:
             other_color_string.remove_liberty(point)
@@ -130,6 +137,10 @@ class Board:
             if other_color_string.num_liberties == 0:
                 self._remove_string(other_color_string)
 
+    # Возвращает количество камней игрока на доске, не просматривая все точки.
+    def num_stones(self, player):
+        return self._stone_counts[player]
+
     def __eq__(self, other):
         return isinstance(other, Board) and \
                self.num_rows == other.num_rows and \
@@ -223,4 +234,8 @@ class GameState:
         if self.last_move.is_resign:
             return self.next_player
         game_result = compute_game_result(self)
-        return game_result.winner
\ No newline at end of file
+        return game_result.winner
+
+
+if instrument.ENABLED:
+    instrument.instrument_engine(sys.modules[__name__])
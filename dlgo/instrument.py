@@ -0,0 +1,118 @@
+import cProfile
+import functools
+import os
+import pstats
+from collections import Counter
+from contextlib import contextmanager
+
+from dlgo.gotypes import Point
+
+__all__ = [
+    'ENABLED',
+    'count_hot_paths',
+    'counters',
+    'profile_select_move',
+    'reset_counters',
+]
+
+ENV_VAR = 'DLGO_COUNTERS'
+# The counters are only installed if the environment variable is set
+# before the board modules are imported; otherwise the boards run
+# unchanged and counting costs nothing.
+ENABLED = os.environ.get(ENV_VAR, '') not in ('', '0')
+
+counters = Counter()
+point_counter_installed = False
+
+
+def _count_calls(function, name):
+    @functools.wraps(function)
+    def counted(*args, **kwargs):
+        counters[name] += 1
+        return function(*args, **kwargs)
+    return counted
+
+
+def _wrap_method(cls, method, name):
+    setattr(cls, method, _count_calls(getattr(cls, method), name))
+
+
+def install_point_counter():
+    global point_counter_installed
+    if point_counter_installed:
+        return
+    point_counter_installed = True
+    original_new = Point.__new__
+
+    def new(cls, *args, **kwargs):
+        counters['points_created'] += 1
+        return original_new(cls, *args, **kwargs)
+    Point.__new__ = staticmethod(new)
+
+
+def instrument_engine(module):
+    """Wrap the hot paths of a board module (goboard_slow, goboard_normal
+    or goboard_fast) so that every call is counted in `counters`.
+    """
+    install_point_counter()
+    # goboard_fast копирует доску своим __deepcopy__, остальные модули — функцией deepcopy
+    if '__deepcopy__' in vars(module.Board):
+        _wrap_method(module.Board, '__deepcopy__', 'deepcopies')
+    else:
+        module.deepcopy = _count_calls(module.deepcopy, 'deepcopies')
+    _wrap_method(module.Board, 'place_stone', 'place_stone')
+    _wrap_method(module.Board, '_remove_string', 'strings_removed')
+    _wrap_method(module.GoString, 'merged_with', 'strings_merged')
+    _wrap_method(module.GameState, 'does_move_violate_ko', 'ko_checks')
+    _wrap_method(module.GameState, 'is_valid_move', 'is_valid_move')
+    _wrap_method(module.GameState, 'legal_moves', 'legal_moves')
+
+
+def reset_counters():
+    counters.clear()
+
+
+@contextmanager
+def count_hot_paths():
+    """Yield a `Counter` that, when the block ends, holds the hot-path
+    calls made inside it, e.g. during one game or one `select_move`.
+    It stays empty unless `DLGO_COUNTERS` is set.
+    """
+    start = Counter(counters)
+    delta = Counter()
+    try:
+        yield delta
+    finally:
+        delta.update(counters)
+        delta.subtract(start)
+
+
+@contextmanager
+def profile_select_move(agent, sort='cumulative', limit=25, path=None, stream=None):
+    """Run cProfile around every `select_move` of `agent` made inside the
+    block and yield the `cProfile.Profile`.
+
+    When the block ends, the `limit` most expensive functions by `sort`
+    are printed to `stream` (stdout by default) and, if `path` is given,
+    the raw stats are saved there for `pstats` or snakeviz. Only the
+    calling thread is profiled, so MCTS pondering is not included.
+    """
+    profiler = cProfile.Profile()
+    select_move = agent.select_move
+
+    @functools.wraps(select_move)
+    def profiled(game_state):
+        profiler.enable()
+        try:
+            return select_move(game_state)
+        finally:
+            profiler.disable()
+    agent.select_move = profiled
+    try:
+        yield profiler
+    finally:
+        del agent.select_move
+        if path is not None:
+            profiler.dump_stats(path)
+        if limit:
+            pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
@@ -0,0 +1,117 @@
+from collections import namedtuple
+
+from dlgo.agent.helpers import move_class
+from dlgo.gotypes import Point
+
+__all__ = [
+    'PerftResult',
+    'perft',
+    'perft_divide',
+]
+
+
+class PerftResult(namedtuple('PerftResult', 'nodes captures ko_rejections suicides')):
+    """Counts of a perft run. `nodes` is the number of move sequences of
+    the requested length. The other counts are taken at the last ply:
+    `captures` is the number of counted plays that capture stones,
+    `ko_rejections` and `suicides` the number of plays on empty points
+    rejected by the ko rule or as self-capture.
+    """
+    def __add__(self, other):
+        return PerftResult(*(a + b for a, b in zip(self, other)))
+
+
+EMPTY_RESULT = PerftResult(0, 0, 0, 0)
+
+
+def is_capture(board, player, point):
+    """Whether a stone of `player` on the empty `point` would capture.
+    Works with any board implementation, unlike `Board.will_capture` of
+    goboard_fast.
+    """
+    for neighbor in point.neighbors():
+        if not board.is_on_grid(neighbor):
+            continue
+        string = board.get_go_string(neighbor)
+        if string is not None and string.color != player and string.num_liberties == 1:
+            return True
+    return False
+
+
+def _last_ply(game_state, stats):
+    # Последний ход: дочерние состояния не строятся, ходы только подсчитываются
+    if not stats:
+        return PerftResult(len(game_state.legal_moves()), 0, 0, 0)
+    board = game_state.board
+    player = game_state.next_player
+    move_type = move_class(game_state)
+    nodes = 2  # пас и сдача партии допустимы всегда
+    captures = ko_rejections = suicides = 0
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            point = Point(row=r, col=c)
+            if board.get(point) is not None:
+                continue
+            move = move_type.play(point)
+            if game_state.is_move_self_capture(player, move):
+                suicides += 1
+            elif game_state.does_move_violate_ko(player, move):
+                ko_rejections += 1
+            else:
+                nodes += 1
+                if is_capture(board, player, point):
+                    captures += 1
+    return PerftResult(nodes, captures, ko_rejections, suicides)
+
+
+def _perft(game_state, depth, stats, bulk):
+    # Ход, которым партия закончилась, тоже завершает последовательность
+    if depth == 0:
+        return PerftResult(1, 0, 0, 0)
+    if game_state.is_over():
+        return EMPTY_RESULT
+    if depth == 1 and bulk:
+        return _last_ply(game_state, stats)
+    result = EMPTY_RESULT
+    for move in game_state.legal_moves():
+        if depth == 1 and stats:
+            # Без bulk последний ход тоже применяется, взятие видно по числу камней соперника
+            player = game_state.next_player
+            child = game_state.apply_move(move)
+            captured = child.board.num_stones(player.other) < game_state.board.num_stones(player.other)
+            result += PerftResult(1, int(captured), 0, 0)
+            continue
+        result += _perft(game_state.apply_move(move), depth - 1, stats, bulk)
+    if depth == 1 and stats:
+        rejected = _last_ply(game_state, stats)
+        result += PerftResult(0, 0, rejected.ko_rejections, rejected.suicides)
+    return result
+
+
+def perft(game_state, depth, stats=False, bulk=True):
+    """Count the legal move sequences of `depth` moves from `game_state`
+    and return a `PerftResult`.
+
+    Passing and resigning are moves like any other; a finished game has
+    no moves, so sequences that end the game before the last ply are not
+    counted. With
+    `stats`, captures, ko rejections and suicides are counted as well.
+    With `bulk`, the last ply only counts moves instead of building
+    their `GameState`s, which is much faster. The result must not depend
+    on the board implementation or on `bulk`, which makes perft a check
+    of `legal_moves` and `is_valid_move` as well as a benchmark of them.
+    """
+    return _perft(game_state, depth, stats, bulk)
+
+
+def perft_divide(game_state, depth, stats=False, bulk=True):
+    """Return a dict from each legal move to the perft result of the
+    position after it, to locate the move where two implementations
+    disagree.
+    """
+    if game_state.is_over() or depth < 1:
+        return {}
+    return {
+        move: _perft(game_state.apply_move(move), depth - 1, stats, bulk)
+        for move in game_state.legal_moves()
+    }
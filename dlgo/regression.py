@@ -0,0 +1,78 @@
+import math
+from collections import namedtuple
+
+__all__ = [
+    'Comparison',
+    'compare_results',
+]
+
+
+# The change of one benchmark against its baseline. `change` is the
+# relative change of the best reproduced calibrated throughput (-0.2 is
+# 20% slower), `limit` the slowdown beyond which it counts as a
+# regression and `noisy` is set when the best runs were too far apart
+# to tell a slowdown of `limit` from chance.
+Comparison = namedtuple(
+    'Comparison', 'engine board_size benchmark baseline current change limit regressed noisy')
+
+
+def best_run(result):
+    """The best throughput a result reached at least twice: its second
+    best run, so that a single lucky run does not set the bar.
+    """
+    runs = sorted(result.runs)
+    return runs[-2] if len(runs) > 1 else runs[-1]
+
+
+def best_run_error(result):
+    """How far the third best run of a result is below `best_run`,
+    relative to it.
+    """
+    if len(result.runs) < 3:
+        return 0.0
+    runs = sorted(result.runs)
+    if runs[-2] <= 0:
+        return 0.0
+    return 1 - runs[-3] / runs[-2]
+
+
+def compare_results(baseline, current, baseline_calibration=None, current_calibration=None,
+                    threshold=0.1, sigmas=2.0):
+    """Compare two lists of `BenchmarkResult`s and return a `Comparison`
+    for every benchmark present in both.
+
+    The best runs (see `best_run`) are compared, and the current one is scaled by the
+    ratio of the calibration scores (see `dlgo.benchmark.calibrate`) of
+    the two runs, or else of the two results if both are given, so that
+    a slower or faster machine does not look like a regression or a
+    speedup. A benchmark regresses when it is slower than the baseline by
+    more than `threshold`. If `sigmas` times the error of the best runs
+    exceeds `threshold`, such a slowdown cannot be told from noise and
+    the comparison is marked `noisy` instead of widening the limit.
+    """
+    run_scale = None
+    if baseline_calibration and current_calibration:
+        run_scale = baseline_calibration / current_calibration
+    baseline_by_key = {
+        (result.engine, result.board_size, result.benchmark): result
+        for result in baseline
+    }
+    comparisons = []
+    for result in current:
+        key = (result.engine, result.board_size, result.benchmark)
+        if key not in baseline_by_key:
+            continue
+        base = baseline_by_key[key]
+        scale = run_scale
+        if scale is None:
+            scale = 1.0
+            if base.calibration and result.calibration:
+                scale = base.calibration / result.calibration
+        base_speed = best_run(base)
+        current_speed = best_run(result) * scale
+        change = current_speed / base_speed - 1
+        noise = math.sqrt(best_run_error(base) ** 2 + best_run_error(result) ** 2)
+        comparisons.append(Comparison(
+            *key, base_speed, current_speed, change, threshold,
+            change < -threshold, sigmas * noise > threshold))
+    return comparisons
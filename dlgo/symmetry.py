@@ -0,0 +1,119 @@
+from dlgo import zobrist
+from dlgo.gotypes import Player, Point
+
+__all__ = [
+    'NUM_SYMMETRIES',
+    'canonical_hash',
+    'inverse_transform',
+    'num_symmetries',
+    'symmetric_hashes',
+    'transform_move',
+    'transform_point',
+]
+
+# The 8 rotations and reflections of a square board as functions of
+# (row, col, num_rows, num_cols). The first 4 map any rectangular board
+# onto itself; the others swap rows and columns.
+TRANSFORMS = [
+    lambda r, c, rows, cols: (r, c),
+    lambda r, c, rows, cols: (r, cols + 1 - c),
+    lambda r, c, rows, cols: (rows + 1 - r, c),
+    lambda r, c, rows, cols: (rows + 1 - r, cols + 1 - c),
+    lambda r, c, rows, cols: (c, r),
+    lambda r, c, rows, cols: (c, rows + 1 - r),
+    lambda r, c, rows, cols: (cols + 1 - c, r),
+    lambda r, c, rows, cols: (cols + 1 - c, rows + 1 - r),
+]
+NUM_SYMMETRIES = len(TRANSFORMS)
+# INVERSES[t] undoes transform t.
+INVERSES = [0, 1, 2, 3, 4, 6, 5, 7]
+
+point_tables = {}
+hash_delta_tables = {}
+
+
+def num_symmetries(dim):
+    rows, cols = dim
+    return NUM_SYMMETRIES if rows == cols else 4
+
+
+def init_symmetry_tables(dim):
+    rows, cols = dim
+    points = {}
+    deltas = {}
+    for r in range(1, rows + 1):
+        for c in range(1, cols + 1):
+            point = Point(row=r, col=c)
+            images = tuple(
+                Point(*transform(r, c, rows, cols))
+                for transform in TRANSFORMS[:num_symmetries(dim)])
+            points[point] = images
+            # Placing or removing a stone flips the point between its empty
+            # and its colored hash code in every transformed board.
+            for color in (Player.black, Player.white):
+                deltas[point, color] = tuple(
+                    zobrist.HASH_CODE[image, None] ^ zobrist.HASH_CODE[image, color]
+                    for image in images)
+    point_tables[dim] = points
+    hash_delta_tables[dim] = deltas
+
+
+def hash_deltas(dim):
+    """Return a dict from `(point, color)` to the changes of the hashes
+    of all symmetric boards when a stone of that color is placed on or
+    removed from the point.
+    """
+    if dim not in hash_delta_tables:
+        init_symmetry_tables(dim)
+    return hash_delta_tables[dim]
+
+
+def transform_point(point, transform, dim):
+    """Return the image of `point` under symmetry number `transform`."""
+    if dim not in point_tables:
+        init_symmetry_tables(dim)
+    return point_tables[dim][point][transform]
+
+
+def inverse_transform(transform):
+    return INVERSES[transform]
+
+
+def transform_move(move, transform, dim):
+    """Return the move with its point mapped by the symmetry; passing and
+    resigning are left as they are.
+    """
+    if not move.is_play:
+        return move
+    return type(move).play(transform_point(move.point, transform, dim))
+
+
+def symmetric_hashes(board):
+    """Return the Zobrist hashes of the board under each of its
+    symmetries. Boards that keep them up to date (goboard_normal and
+    goboard_fast) return them directly; otherwise they are computed from
+    the stones.
+    """
+    if hasattr(board, 'symmetric_hashes'):
+        return board.symmetric_hashes()
+    dim = (board.num_rows, board.num_cols)
+    deltas = hash_deltas(dim)
+    hashes = [zobrist.EMPTY_BOARD] * num_symmetries(dim)
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            point = Point(row=r, col=c)
+            color = board.get(point)
+            if color is not None:
+                hashes = [h ^ d for h, d in zip(hashes, deltas[point, color])]
+    return hashes
+
+
+def canonical_hash(board):
+    """Return `(hash, transform)`: the smallest hash of the board over its
+    symmetries and the number of the symmetry that produces it. Symmetric
+    boards share the hash; `transform` maps points of this board to the
+    canonical one.
+    """
+    hashes = symmetric_hashes(board)
+    transform = min(range(len(hashes)), key=hashes.__getitem__)
+    return hashes[transform], transform
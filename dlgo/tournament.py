@@ -0,0 +1,250 @@
+import math
+import random
+import time
+from collections import namedtuple
+from multiprocessing import Pool
+
+import numpy as np
+
+from dlgo import goboard_fast as goboard
+from dlgo.gotypes import Player
+from dlgo.scoring import compute_game_result
+
+__all__ = [
+    'AgentSpec',
+    'GameRecord',
+    'MatchResult',
+    'SPRT',
+    'elo_to_score',
+    'iter_games',
+    'play_game',
+    'run_match',
+    'wilson_interval',
+]
+
+
+class AgentSpec(namedtuple('AgentSpec', 'name agent_class args kwargs')):
+    """Picklable description of an agent: a fresh agent is built from it
+    in the worker process for every game, e.g.
+    `AgentSpec('mcts', MCTSAgent, (20, 1.4))`.
+    """
+    def __new__(cls, name, agent_class, args=(), kwargs=None):
+        return super().__new__(cls, name, agent_class, tuple(args), dict(kwargs or {}))
+
+    def build(self):
+        return self.agent_class(*self.args, **self.kwargs)
+
+
+# One finished game. `move_times` maps each agent's name to the total
+# seconds it spent in `select_move`, `move_counts` to its number of moves.
+GameRecord = namedtuple(
+    'GameRecord', 'index black white winner num_moves seconds move_times move_counts')
+
+
+def play_game(index, black, white, board_size, seed, max_moves=None):
+    """Play one game between two `AgentSpec`s and return a `GameRecord`.
+
+    `random` and NumPy are seeded with `seed`, so a game can be replayed.
+    If `max_moves` is reached, the game is scored as it stands.
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    specs = {Player.black: black, Player.white: white}
+    bots = {player: spec.build() for player, spec in specs.items()}
+    move_times = {black.name: 0.0, white.name: 0.0}
+    move_counts = {black.name: 0, white.name: 0}
+    start = time.perf_counter()
+    game = goboard.GameState.new_game(board_size)
+    num_moves = 0
+    while not game.is_over():
+        if max_moves is not None and num_moves >= max_moves:
+            break
+        name = specs[game.next_player].name
+        move_start = time.perf_counter()
+        move = bots[game.next_player].select_move(game)
+        move_times[name] += time.perf_counter() - move_start
+        move_counts[name] += 1
+        game = game.apply_move(move)
+        num_moves += 1
+    winner = game.winner() if game.is_over() else compute_game_result(game).winner
+    return GameRecord(
+        index, black.name, white.name, specs[winner].name, num_moves,
+        time.perf_counter() - start, move_times, move_counts)
+
+
+def _game_tasks(agent_a, agent_b, num_games, board_size, seed, max_moves):
+    # Цвета чередуются, у каждой партии свое зерно генератора случайных чисел
+    rng = random.Random(seed)
+    for index in range(num_games):
+        black, white = (agent_a, agent_b) if index % 2 == 0 else (agent_b, agent_a)
+        yield index, black, white, board_size, rng.getrandbits(63), max_moves
+
+
+def _play_task(task):
+    return play_game(*task)
+
+
+def iter_games(agent_a, agent_b, num_games, board_size=9, num_workers=None,
+               seed=0, max_moves=None):
+    """Play `num_games` between two `AgentSpec`s and yield a `GameRecord`
+    for each game as soon as it finishes.
+
+    Agents alternate colors and every game gets its own seed derived from
+    `seed`. Games run in a pool of `num_workers` processes (by default
+    one per CPU); with `num_workers=1` they run in this process. Closing
+    the generator early terminates the pool, abandoning the games still
+    being played.
+    """
+    assert agent_a.name != agent_b.name
+    tasks = _game_tasks(agent_a, agent_b, num_games, board_size, seed, max_moves)
+    if num_workers == 1:
+        for task in tasks:
+            yield play_game(*task)
+        return
+    # При выходе из блока with пул завершает процессы, в том числе с недоигранными партиями
+    with Pool(num_workers) as pool:
+        yield from pool.imap_unordered(_play_task, tasks)
+
+
+def wilson_interval(wins, games, z=1.96):
+    """Wilson score interval for a win rate (95% for the default z)."""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return center - margin, center + margin
+
+
+def elo_to_score(elo):
+    """Expected score of a player `elo` points stronger than its opponent."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class SPRT:
+    """Sequential probability ratio test of H0: the agent is `elo0`
+    points stronger than its opponent, against H1: it is `elo1` points
+    stronger (`elo0 < elo1`).
+
+    `alpha` is the probability of accepting H1 when H0 holds and `beta`
+    that of accepting H0 when H1 holds. Games of go have no draws, so
+    the log-likelihood ratio is that of a binomial model.
+    """
+    def __init__(self, elo0=0, elo1=50, alpha=0.05, beta=0.05):
+        assert elo0 < elo1
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        p0 = elo_to_score(elo0)
+        p1 = elo_to_score(elo1)
+        self.win_llr = math.log(p1 / p0)
+        self.loss_llr = math.log((1 - p1) / (1 - p0))
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def llr(self, wins, losses):
+        return wins * self.win_llr + losses * self.loss_llr
+
+    def status(self, wins, losses):
+        """Return 'H1' or 'H0' once a hypothesis is accepted, else None."""
+        llr = self.llr(wins, losses)
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def __str__(self):
+        return 'SPRT elo0=%g elo1=%g alpha=%g beta=%g' % (
+            self.elo0, self.elo1, self.alpha, self.beta)
+
+
+class MatchResult:
+    """Running totals of a match between two agents."""
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.wins = {name: 0 for name in self.names}
+        self.black_wins = {name: 0 for name in self.names}
+        self.move_times = {name: 0.0 for name in self.names}
+        self.move_counts = {name: 0 for name in self.names}
+        self.num_games = 0
+        self.sprt = None
+        self.sprt_status = None
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, record):
+        self.num_games += 1
+        self.wins[record.winner] += 1
+        if record.winner == record.black:
+            self.black_wins[record.winner] += 1
+        for name in self.names:
+            self.move_times[name] += record.move_times[name]
+            self.move_counts[name] += record.move_counts[name]
+        self.elapsed = time.perf_counter() - self.start
+        if self.sprt is not None:
+            first, second = self.names
+            self.sprt_status = self.sprt.status(self.wins[first], self.wins[second])
+
+    def win_rate(self, name):
+        if self.num_games == 0:
+            return 0.0
+        return self.wins[name] / self.num_games
+
+    def confidence_interval(self, name, z=1.96):
+        return wilson_interval(self.wins[name], self.num_games, z)
+
+    @property
+    def games_per_hour(self):
+        if self.elapsed <= 0:
+            return 0.0
+        return self.num_games / self.elapsed * 3600
+
+    def latency_ms(self, name):
+        """Mean time per move of an agent, in milliseconds."""
+        if self.move_counts[name] == 0:
+            return 0.0
+        return self.move_times[name] / self.move_counts[name] * 1000
+
+    def __str__(self):
+        lines = ['%d games in %.1fs (%.0f games/hour)' % (
+            self.num_games, self.elapsed, self.games_per_hour)]
+        for name in self.names:
+            low, high = self.confidence_interval(name)
+            lines.append('  %s: %d wins (%d as black), win rate %.3f [%.3f, %.3f], %.1f ms/move' % (
+                name, self.wins[name], self.black_wins[name], self.win_rate(name),
+                low, high, self.latency_ms(name)))
+        if self.sprt is not None:
+            first, second = self.names
+            lines.append('  %s: LLR %.2f [%.2f, %.2f], %s' % (
+                self.sprt, self.sprt.llr(self.wins[first], self.wins[second]),
+                self.sprt.lower, self.sprt.upper,
+                'accepted ' + self.sprt_status if self.sprt_status else 'undecided'))
+        return '\n'.join(lines)
+
+
+def run_match(agent_a, agent_b, num_games, board_size=9, num_workers=None,
+              seed=0, max_moves=None, on_game=None, sprt=None):
+    """Play a match with `iter_games` and return its `MatchResult`.
+    `on_game(record, result)` is called after every finished game.
+
+    With an `SPRT` for `agent_a` against `agent_b`, the match stops as
+    soon as the test accepts a hypothesis; `num_games` is then only an
+    upper bound and the games still in progress are abandoned.
+    """
+    result = MatchResult((agent_a.name, agent_b.name))
+    result.sprt = sprt
+    games = iter_games(agent_a, agent_b, num_games, board_size,
+                       num_workers, seed, max_moves)
+    try:
+        for record in games:
+            result.add(record)
+            if on_game is not None:
+                on_game(record, result)
+            if result.sprt_status is not None:
+                break
+    finally:
+        games.close()
+    return result
@@ -0,0 +1,22 @@
+from dlgo.benchmark import run_suite, save_results
+import sys
+
+
+def main():
+    # Путь к JSON-файлу с результатами можно передать первым аргументом
+    path = sys.argv[1] if len(sys.argv) > 1 else 'benchmark_results.json'
+    repeat = 5
+    min_time = 0.1
+    seed = 0
+
+    def on_result(result):
+        print(f"{result.engine:>6} {result.board_size}x{result.board_size} {result.benchmark:<13} "
+              f"{result.ops_per_sec:12.1f} ops/sec +- {result.ops_per_sec_stdev:.1f}")
+
+    results = run_suite(repeat=repeat, min_time=min_time, seed=seed, on_result=on_result)
+    save_results(results, path, repeat, min_time, seed)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+from dlgo import goboard_fast as goboard
+from dlgo.agent.minimax import AlphaBetaAgent, DepthPrunedAgent, MoveOrderer, TranspositionTable
+from dlgo.agent.naive import RandomBot
+import random
+
+
+def random_position(board_size, num_moves):
+    game = goboard.GameState.new_game(board_size)
+    bot = RandomBot()
+    for i in range(num_moves):
+        game = game.apply_move(bot.select_move(game))
+    return game
+
+
+def main():
+    random.seed(0)
+    # Количество просмотренных узлов для одной и той же позиции при разных настройках поиска:
+    # чем лучше упорядочены ходы, тем раньше происходят отсечения и тем меньше узлов.
+    for board_size, max_depth, num_moves in ((3, 5, 2), (4, 3, 5), (5, 2, 8)):
+        game = random_position(board_size, num_moves)
+        bots = {
+            'DepthPrunedAgent': DepthPrunedAgent(max_depth),
+            'AlphaBetaAgent': AlphaBetaAgent(max_depth),
+            'AlphaBetaAgent + MoveOrderer': AlphaBetaAgent(
+                max_depth, move_orderer=MoveOrderer()),
+            'AlphaBetaAgent + MoveOrderer + TT': AlphaBetaAgent(
+                max_depth, move_orderer=MoveOrderer(),
+                transposition_table=TranspositionTable()),
+        }
+        print(f"Board {board_size}x{board_size}, depth {max_depth}:")
+        for name, bot in bots.items():
+            bot.select_move(game)
+            print(f"  {name}: {bot.last_nodes} nodes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+from dlgo.benchmark import calibrate, load_calibration, load_results, merge_results, run_suite, save_results
+from dlgo.regression import compare_results
+import os
+import sys
+
+# Проверяется goboard_fast, на котором играют агенты, а также скорость самих агентов
+ENGINES = ('fast',)
+BENCHMARKS = ('apply_move', 'legal_moves', 'is_valid_move', 'playout', 'mcts_rollout', 'alphabeta_node')
+HASH_SEED = '0'
+
+
+def main():
+    # python perf_gate.py [perf_baseline.json] [--update]
+    if os.environ.get('PYTHONHASHSEED') != HASH_SEED:
+        # Скорость словарей и множеств точек зависит от случайной соли хешей и меняется
+        # от запуска к запуску на 10%; с постоянной солью запуски сравнимы
+        os.execve(sys.executable, [sys.executable] + sys.argv,
+                  dict(os.environ, PYTHONHASHSEED=HASH_SEED))
+    args = [arg for arg in sys.argv[1:] if arg != '--update']
+    update = '--update' in sys.argv[1:]
+    path = args[0] if args else 'perf_baseline.json'
+    # Партия или MCTS на 19x19 длится дольше min_time, и каждый замер — одна операция,
+    # поэтому замеров нужно много, чтобы лучший из них был воспроизводим
+    repeat = 7
+    min_time = 0.1
+    seed = 0
+    passes = 5
+    # Лучшие замеры одного и того же кода на общей машине расходятся между запусками
+    # до 13%, поэтому порог постоянный, но с запасом
+    threshold = 0.15
+
+    # Несколько проходов с калибровкой перед каждым тестом; скорость машины — лучшая
+    # из всех калибровок, как и скорость каждого теста — лучший из его замеров
+    calibration = calibrate()
+    results = merge_results([
+        run_suite(ENGINES, benchmarks=BENCHMARKS, repeat=repeat, min_time=min_time,
+                  seed=seed, calibrate_each=True)
+        for i in range(passes)
+    ])
+    calibration = max([calibration] + [result.calibration for result in results])
+    if update or not os.path.exists(path):
+        save_results(results, path, repeat, min_time, seed, calibration)
+        print(f"Baseline written to {path}")
+        return
+
+    comparisons = compare_results(
+        load_results(path), results, load_calibration(path), calibration, threshold)
+    print(f"Calibration: {calibration:.0f} loops/sec (baseline {load_calibration(path):.0f})")
+    for c in comparisons:
+        status = 'REGRESSION' if c.regressed else 'TOO NOISY' if c.noisy else 'ok'
+        print(f"{c.engine:>6} {c.board_size}x{c.board_size} {c.benchmark:<15} "
+              f"{c.baseline:12.1f} -> {c.current:12.1f} ops/sec {c.change:+7.1%} "
+              f"(limit -{c.limit:.1%}) {status}")
+    regressions = [c for c in comparisons if c.regressed]
+    noisy = [c for c in comparisons if c.noisy and not c.regressed]
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed")
+    if noisy:
+        # Шум не расширяет порог: такой результат ничего не доказывает
+        print(f"{len(noisy)} benchmark(s) too noisy to detect a {threshold:.0%} slowdown; "
+              f"rerun on a quieter machine")
+    if regressions or noisy:
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == '__main__':
+    main()
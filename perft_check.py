@@ -0,0 +1,50 @@
+from dlgo.benchmark import ENGINES, make_case
+from dlgo.gotypes import Point
+from dlgo.perft import perft
+import time
+
+
+# Белые только что взяли камень в ко, черные не могут сразу взять обратно (None — пас)
+KO_MOVES = [(1, 2), (1, 3), (2, 1), (2, 4), (3, 2), (3, 3), (2, 3), (4, 4), None, (2, 2)]
+
+
+def ko_position(engine):
+    game = engine.GameState.new_game(4)
+    for move in KO_MOVES:
+        game = game.apply_move(
+            engine.Move.pass_turn() if move is None else engine.Move.play(Point(*move)))
+    return game
+
+
+def main():
+    # Позиции: пустые доски и середина партии случайных ходов с фиксированным зерном
+    cases = [
+        ('empty 3x3', 3, None, 4),
+        ('empty 5x5', 5, None, 2),
+        ('5x5 middle game', 5, 2, 3),
+        ('9x9 middle game', 9, 2, 2),
+        ('ko 4x4', 4, 'ko', 3),
+    ]
+    for name, board_size, position, depth in cases:
+        print(f"{name}, depth {depth}:")
+        counts = set()
+        for engine_name, engine in ENGINES.items():
+            if position is None:
+                game = engine.GameState.new_game(board_size)
+            elif position == 'ko':
+                game = ko_position(engine)
+            else:
+                game = make_case(engine_name, board_size).positions[position]
+            for bulk in (True, False):
+                start = time.perf_counter()
+                result = perft(game, depth, stats=True, bulk=bulk)
+                elapsed = time.perf_counter() - start
+                counts.add(result)
+                print(f"  {engine_name:>6} bulk={bulk!s:<5} {result}, "
+                      f"{result.nodes / elapsed:.0f} nodes/sec")
+        # Все реализации доски и оба режима должны насчитать одно и то же
+        print("  OK" if len(counts) == 1 else "  MISMATCH")
+
+
+if __name__ == '__main__':
+    main()
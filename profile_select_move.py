@@ -0,0 +1,28 @@
+from dlgo import goboard_fast as goboard
+from dlgo.agent.mcts.mcts import MCTSAgent
+from dlgo.agent.naive import RandomBot
+from dlgo.instrument import ENABLED, count_hot_paths, profile_select_move
+import random
+
+
+def main():
+    # Счетчики вызовов работают, только если скрипт запущен с DLGO_COUNTERS=1
+    random.seed(0)
+    game = goboard.GameState.new_game(9)
+    bot = RandomBot()
+    for i in range(20):
+        game = game.apply_move(bot.select_move(game))
+
+    agent = MCTSAgent(50, 1.4)
+    with count_hot_paths() as counts, profile_select_move(agent, limit=20):
+        agent.select_move(game)
+    if ENABLED:
+        print("Hot-path calls during select_move:")
+        for name, count in sorted(counts.items()):
+            print(f"  {name}: {count}")
+    else:
+        print("Set DLGO_COUNTERS=1 to count hot-path calls")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+from dlgo.agent.mcts.mcts import MCTSAgent
+from dlgo.tournament import AgentSpec, run_match
+
+
+def main():
+    board_size = 5
+    num_games = 100
+    reference_rounds = 200
+    # Сколько симуляций нужно RAVE-агенту, чтобы играть наравне с UCT-агентом с 200 симуляциями:
+    # при таком бюджете на доске 5x5 (27 ходов в корне) дерево успевает вырасти глубже корня.
+    # Для сравнения с тем же уменьшенным бюджетом играет и обычный UCT-агент.
+    # Цвета чередуются, чтобы компенсировать преимущество первого хода.
+    reference = AgentSpec('reference', MCTSAgent, (reference_rounds,), {'temperature': 1.4})
+    equal_strength = None
+    for num_rounds in (50, 100, reference_rounds):
+        agents = [('rave', {'temperature': 1.4, 'rave': True})]
+        if num_rounds < reference_rounds:
+            agents.append(('uct', {'temperature': 1.4}))
+        for name, options in agents:
+            result = run_match(
+                AgentSpec(name, MCTSAgent, (num_rounds,), options), reference, num_games, board_size)
+            low, high = result.confidence_interval(name)
+            print(f"{name.upper()} with {num_rounds} rounds vs UCT with {reference_rounds}: "
+                  f"win rate {result.win_rate(name):.3f} [{low:.3f}, {high:.3f}] "
+                  f"over {result.num_games} games")
+            # Равная сила: доверительный интервал не исключает половины побед
+            if name == 'rave' and equal_strength is None and high >= 0.5:
+                equal_strength = num_rounds
+    if equal_strength is None:
+        print(f"RAVE is weaker than UCT at every budget up to {reference_rounds} rounds")
+    else:
+        print(f"RAVE needs {equal_strength} rounds to match UCT with {reference_rounds} rounds")
+
+
+if __name__ == '__main__':
+    main()
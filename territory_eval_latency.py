@@ -0,0 +1,47 @@
+from dlgo import goboard_fast as goboard
+from dlgo.agent.minimax import territory_diff, territory_diff_batch
+from dlgo.agent.minimax.helpers import capture_diff
+from dlgo.agent.naive import RandomBot
+from dlgo.encoders import encode_boards
+import random
+import time
+
+
+def random_positions(board_size, num_positions, num_moves):
+    bot = RandomBot()
+    positions = []
+    for i in range(num_positions):
+        game = goboard.GameState.new_game(board_size)
+        for j in range(num_moves):
+            move = bot.select_move(game)
+            if not move.is_resign:
+                game = game.apply_move(move)
+        positions.append(game)
+    return positions
+
+
+def per_call_us(fn, args, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        for arg in args:
+            fn(arg)
+    return (time.perf_counter() - start) / (repeats * len(args)) * 1e6
+
+
+def main():
+    random.seed(0)
+    num_positions = 64
+    # Задержка одного вызова функции оценки (в микросекундах) для позиций середины игры;
+    # пакетная оценка считается на одну позицию при оценке всех позиций одним вызовом.
+    for board_size in (9, 13, 19):
+        positions = random_positions(board_size, num_positions, board_size * board_size // 2)
+        batch = encode_boards([game.board for game in positions])
+        print(f"Board {board_size}x{board_size}:")
+        print(f"  capture_diff: {per_call_us(capture_diff, positions, 50):.1f} us")
+        print(f"  territory_diff: {per_call_us(territory_diff, positions, 5):.1f} us")
+        batch_us = per_call_us(territory_diff_batch, [batch], 20) / num_positions
+        print(f"  territory_diff_batch ({num_positions} boards): {batch_us:.1f} us per board")
+
+
+if __name__ == '__main__':
+    main()